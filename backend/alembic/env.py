@@ -6,7 +6,7 @@ from core.config import settings
 from core.database import Base
 from models.user import User
 from models.workspace import Workspace, WorkspaceMember 
-from models.task import Task # Import all models here to register them
+from models.task import Task, TaskTombstone, TaskCounter # Import all models here to register them
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,30 @@
+"""add_task_listing_indexes
+
+Revision ID: 3c1f8a2b7d4e
+Revises: edfeb8eb8c5d
+Create Date: 2026-10-18 09:12:41.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8a2b7d4e'
+down_revision: Union[str, None] = 'edfeb8eb8c5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_workspace_id_id', 'tasks', ['workspace_id', 'id'], unique=False)
+    op.create_index('ix_tasks_workspace_id_status_id', 'tasks', ['workspace_id', 'status', 'id'], unique=False)
+    op.create_index('ix_tasks_workspace_id_assignee_id_id', 'tasks', ['workspace_id', 'assignee_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_workspace_id_assignee_id_id', table_name='tasks')
+    op.drop_index('ix_tasks_workspace_id_status_id', table_name='tasks')
+    op.drop_index('ix_tasks_workspace_id_id', table_name='tasks')
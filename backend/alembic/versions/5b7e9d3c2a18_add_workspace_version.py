@@ -0,0 +1,26 @@
+"""add_workspace_version
+
+Revision ID: 5b7e9d3c2a18
+Revises: 8e4d2c6a1f90
+Create Date: 2026-10-18 13:41:05.117734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e9d3c2a18'
+down_revision: Union[str, None] = '8e4d2c6a1f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workspaces', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('workspaces', 'version')
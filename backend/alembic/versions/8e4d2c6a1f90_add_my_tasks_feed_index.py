@@ -0,0 +1,31 @@
+"""add_my_tasks_feed_index
+
+Revision ID: 8e4d2c6a1f90
+Revises: 3c1f8a2b7d4e
+Create Date: 2026-10-18 10:03:17.842259
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4d2c6a1f90'
+down_revision: Union[str, None] = '3c1f8a2b7d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_tasks_assignee_id_priority_due_date_id',
+        'tasks',
+        ['assignee_id', 'priority', 'due_date', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_assignee_id_priority_due_date_id', table_name='tasks')
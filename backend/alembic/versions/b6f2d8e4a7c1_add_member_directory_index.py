@@ -0,0 +1,30 @@
+"""add_member_directory_index
+
+Revision ID: b6f2d8e4a7c1
+Revises: 7d3e5a1c9f64
+Create Date: 2026-10-18 21:42:10.418377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f2d8e4a7c1'
+down_revision: Union[str, None] = '7d3e5a1c9f64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # workspace_members(workspace_id, user_id) is already served by its primary key
+    if op.get_bind().dialect.name == 'postgresql':
+        # Same as models.user.USER_EMAIL_DIRECTORY_DDL: serves the member directory's prefix LIKE and ORDER BY
+        op.execute('CREATE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email) COLLATE "C")')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,43 @@
+"""add_task_change_feed
+
+Revision ID: c4a71e0f9b32
+Revises: 5b7e9d3c2a18
+Create Date: 2026-10-18 15:02:47.530219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a71e0f9b32'
+down_revision: Union[str, None] = '5b7e9d3c2a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_tasks_workspace_id_change_seq', 'tasks', ['workspace_id', 'change_seq'], unique=False)
+    op.add_column('workspaces', sa.Column('changes_floor', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('task_tombstones',
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('workspace_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index('ix_task_tombstones_workspace_id_change_seq', 'task_tombstones', ['workspace_id', 'change_seq'], unique=False)
+    op.create_index('ix_task_tombstones_deleted_at', 'task_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_tombstones_deleted_at', table_name='task_tombstones')
+    op.drop_index('ix_task_tombstones_workspace_id_change_seq', table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+    op.drop_column('workspaces', 'changes_floor')
+    op.drop_index('ix_tasks_workspace_id_change_seq', table_name='tasks')
+    op.drop_column('tasks', 'change_seq')
@@ -0,0 +1,48 @@
+"""add_task_counters
+
+Revision ID: e2b9f4d6c815
+Revises: c4a71e0f9b32
+Create Date: 2026-10-18 16:20:13.804471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b9f4d6c815'
+down_revision: Union[str, None] = 'c4a71e0f9b32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_counters',
+    sa.Column('workspace_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('workspace_id', 'dimension', 'key')
+    )
+    # Backfill from existing tasks (same keys as core.counters.task_counter_keys).
+    # date() rather than CAST(... AS DATE), which SQLite turns into the year alone
+    op.execute("""
+        INSERT INTO task_counters (workspace_id, dimension, key, count)
+        SELECT workspace_id, 'status', CAST(status AS VARCHAR), COUNT(*) FROM tasks GROUP BY workspace_id, status
+        UNION ALL
+        SELECT workspace_id, 'priority', CAST(priority AS VARCHAR), COUNT(*) FROM tasks GROUP BY workspace_id, priority
+        UNION ALL
+        SELECT workspace_id, 'assignee', COALESCE(CAST(assignee_id AS VARCHAR), ''), COUNT(*)
+        FROM tasks GROUP BY workspace_id, assignee_id
+        UNION ALL
+        SELECT workspace_id, 'due', CAST(date(due_date) AS VARCHAR), COUNT(*)
+        FROM tasks WHERE due_date IS NOT NULL AND status != 'DONE'
+        GROUP BY workspace_id, date(due_date)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('task_counters')
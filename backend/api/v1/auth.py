@@ -1,85 +1,219 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+import secrets
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 
-from core.database import get_db
-from core.security import verify_password, get_password_hash, create_access_token
+from core.database import chunked, get_db, read_replica
+from core.security import (
+    Principal, principal_cache, token_digest, verify_password_async, get_password_hash_async,
+    create_access_token, invalidate_membership, invalidate_user_memberships, UNUSABLE_PASSWORD
+)
 from core.config import settings
 from models.user import User
 from models.workspace import Workspace, WorkspaceMember, WorkspaceType, WorkspaceRole
-from schemas.user import UserCreate, UserResponse, Token
+from schemas.user import UserCreate, UserResponse, Token, UserProvisionRequest, UserProvisionResponse
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User.id).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
+    # Give the connection back while bcrypt runs; the unique index re-checks the email on insert
+    await db.rollback()
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     new_user = User(email=user.email, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Create Default Personal Workspace
-    personal_ws = Workspace(
-        name="Personal",
-        type=WorkspaceType.PERSONAL,
-        owner_id=new_user.id
-    )
-    db.add(personal_ws)
-    db.commit()
-    db.refresh(personal_ws)
-
-    # Add user as ADMIN of their own personal workspace
-    ws_member = WorkspaceMember(
-        workspace_id=personal_ws.id,
-        user_id=new_user.id,
-        role=WorkspaceRole.ADMIN
-    )
-    db.add(ws_member)
-    db.commit()
+
+    # Default Personal Workspace, with the user as its ADMIN. One flush inserts all three rows in
+    # dependency order (ids come back from the INSERTs) and one commit makes them visible together.
+    personal_ws = Workspace(name="Personal", type=WorkspaceType.PERSONAL, owner=new_user)
+    db.add_all([
+        new_user,
+        personal_ws,
+        WorkspaceMember(workspace=personal_ws, user=new_user, role=WorkspaceRole.ADMIN),
+    ])
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration of the same email
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    invalidate_membership(new_user.id, personal_ws.id)
     
     return new_user
 
+@router.post("/provision", response_model=UserProvisionResponse)
+async def provision_users(
+    provision: UserProvisionRequest,
+    x_provisioning_token: str = Header(""),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many users, each with a personal workspace, in one transaction (SSO/SCIM imports).
+    Emails already registered are reported and left untouched. Requires PROVISIONING_TOKEN.
+    """
+    # 1. Validate Access
+    if not settings.PROVISIONING_TOKEN or not secrets.compare_digest(
+        x_provisioning_token.encode(), settings.PROVISIONING_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid provisioning token")
+
+    # 2. Skip duplicates within the request and emails already registered
+    requested = {}
+    for item in provision.users:
+        requested.setdefault(item.email, item)
+    existing = set()
+    for chunk in chunked(requested):
+        existing.update(await db.scalars(select(User.email).where(User.email.in_(chunk))))
+    new_users = [item for email, item in requested.items() if email not in existing]
+    # Don't sit idle in a transaction while hashing; the unique index re-checks on insert
+    await db.rollback()
+    if not new_users:
+        return UserProvisionResponse(created=[], existing=sorted(existing))
+
+    # 3. Hash the given passwords, keeping every hashing worker busy without overflowing its queue
+    hashed_passwords = [UNUSABLE_PASSWORD] * len(new_users)
+    with_password = [index for index, item in enumerate(new_users) if item.password]
+    for start in range(0, len(with_password), settings.PASSWORD_HASH_WORKERS):
+        indexes = with_password[start:start + settings.PASSWORD_HASH_WORKERS]
+        hashed = await asyncio.gather(*(get_password_hash_async(new_users[index].password) for index in indexes))
+        for index, password_hash in zip(indexes, hashed):
+            hashed_passwords[index] = password_hash
+
+    # 4. One multi-row INSERT ... RETURNING per table; rows come back in parameter order
+    try:
+        user_ids = (await db.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"email": item.email, "hashed_password": hashed, "is_active": True}
+             for item, hashed in zip(new_users, hashed_passwords)]
+        )).all()
+        workspace_ids = (await db.scalars(
+            insert(Workspace).returning(Workspace.id, sort_by_parameter_order=True),
+            [{"name": "Personal", "type": WorkspaceType.PERSONAL, "owner_id": user_id} for user_id in user_ids]
+        )).all()
+        await db.execute(insert(WorkspaceMember), [
+            {"workspace_id": workspace_id, "user_id": user_id, "role": WorkspaceRole.ADMIN}
+            for user_id, workspace_id in zip(user_ids, workspace_ids)
+        ])
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Some emails were registered concurrently, retry")
+    invalidate_user_memberships(*user_ids)
+
+    return UserProvisionResponse(
+        created=[UserResponse(id=user_id, email=item.email, is_active=True) for user_id, item in zip(user_ids, new_users)],
+        existing=sorted(existing)
+    )
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # OAuth2PasswordRequestForm expects 'username' field, we map email to it
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Plain columns rather than the entity: the rollback below would expire it
+    user = (await db.execute(
+        select(User.id, User.email, User.hashed_password, User.is_active).where(User.email == form_data.username)
+    )).first()
+    # Give the connection back before bcrypt, or a login burst checks out the whole pool
+    await db.rollback()
+    if (
+        not user
+        or not user.is_active
+        or not await verify_password_async(form_data.password, user.hashed_password)
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    # The uid claim lets token resolution use a primary key lookup instead of the email index
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def resolve_principal(token: str, db: AsyncSession) -> Optional[Principal]:
+    """
+    Resolve a bearer token to its Principal, or None if it is invalid, expired or belongs to an
+    inactive user. Repeat calls with the same token are served from principal_cache without
+    decoding the JWT or touching the database.
+    """
+    digest = token_digest(token)
+    principal = principal_cache.get(digest)
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        return None
+
+    user_id = payload.get("uid")
+    email = payload.get("sub")
+    if isinstance(user_id, int):
+        user = await db.get(User, user_id)
+    elif email is not None:
+        # Tokens issued before the uid claim existed
+        user = await db.scalar(select(User).where(User.email == email))
+    else:
+        return None
+
+    if user is None or not user.is_active:
+        return None
+
+    principal = Principal(id=user.id, email=user.email, is_active=user.is_active)
+    expires_at = payload.get("exp")
+    expires_in = expires_at - datetime.now(timezone.utc).timestamp() if expires_at else None
+    principal_cache.set(digest, principal, ttl=expires_in)
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    principal = await resolve_principal(token, db)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    x_last_write: Optional[str] = Header(None, description="The X-Last-Write of the client's latest write")
+):
+    """
+    Session for read-only endpoints: the replica when one is configured and the client has not written
+    recently, otherwise the request's primary session.
+    """
+    try:
+        last_write = float(x_last_write) if x_last_write else None
+    except ValueError:
+        last_write = None
+    if not read_replica.serves(last_write):
+        yield db
+        return
+    async with read_replica.sessionmaker() as read_db:
+        yield read_db
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     return current_user
+
+@router.post("/me/deactivate")
+async def deactivate_me(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Deactivate the current account. Cached sessions of the user are dropped on commit.
+    """
+    user = await db.get(User, current_user.id)
+    user.is_active = False
+    await db.commit()
+    
+    return {"status": "success", "message": "Account deactivated"}
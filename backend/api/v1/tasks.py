@@ -1,153 +1,421 @@
+from datetime import datetime
+from types import SimpleNamespace
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, exists, or_, select, insert, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.counters import task_counter_keys, update_task_counters, rebuild_task_counters, read_task_counters, count_overdue
+from core.database import chunked, get_db
+from core.etag import make_etag, is_not_modified, not_modified, set_etag
+from core.pagination import encode_cursor, decode_cursor
+from core.search import task_search_query
+from core.serialization import Projection, json_response
 from core.websocket import manager
-from models.user import User
-from models.task import Task, TaskStatus
-from models.workspace import WorkspaceMember
-from schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskWithWorkspace
-from api.v1.auth import get_current_user
-from api.v1.workspaces import validate_workspace_access
+from core.security import Principal
+from models.task import Task, TaskStatus, TaskPriority, TaskTombstone
+from models.workspace import Workspace, WorkspaceMember, WorkspaceRole
+from schemas.task import (
+    TaskCreate, TaskResponse, TaskUpdate, TaskWithWorkspace, WorkspaceInfo, TaskChanges, TaskSummary,
+    TaskBatchRequest, TaskBatchResponse, TaskBatchResult, TASK_BATCH_MAX_ITEMS
+)
+from api.v1.auth import get_current_user, get_read_db
+from api.v1.workspaces import validate_workspace_access, bump_workspace_version, get_workspace_version
 
 router = APIRouter()
 
+MY_TASKS_STREAM_BATCH_SIZE = 500
+
+# List endpoints select these columns and serialize the rows directly (see core/serialization.py)
+TASK_ROW = Projection(TaskResponse, Task)
+TASK_WITH_WORKSPACE_ROW = Projection(TaskWithWorkspace, Task, workspace=(WorkspaceInfo, Workspace))
+
+def my_tasks_query(user_id: int):
+    """
+    Rows of TASK_WITH_WORKSPACE_ROW for the tasks assigned to a user, sorted by Priority (P0 first),
+    Due Date (earliest first, undated last) and id. TaskPriority members are declared in P0..P3 order,
+    so the Postgres enum order and the SQLite string order agree. The sort matches
+    ix_tasks_assignee_id_priority_due_date_id.
+    """
+    return (
+        select(*TASK_WITH_WORKSPACE_ROW.columns)
+        .join(Task.workspace)
+        .where(Task.assignee_id == user_id)
+        .order_by(Task.priority.asc(), Task.due_date.asc().nulls_last(), Task.id.asc())
+    )
+
+def after_my_tasks_cursor(cursor: str):
+    """
+    Keyset predicate for the rows that sort after the (priority, due_date, id) cursor.
+    """
+    priority, due_date, last_id = decode_cursor(cursor, str, (str, type(None)), int)
+    try:
+        priority = TaskPriority(priority)
+        due_date = datetime.fromisoformat(due_date) if due_date is not None else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if due_date is None:
+        # Undated tasks sort last within a priority, so only later ids remain
+        same_priority = and_(Task.due_date.is_(None), Task.id > last_id)
+    else:
+        same_priority = or_(
+            Task.due_date > due_date,
+            Task.due_date.is_(None),
+            and_(Task.due_date == due_date, Task.id > last_id)
+        )
+    return or_(Task.priority > priority, and_(Task.priority == priority, same_priority))
+
+async def stream_my_tasks(bind, user_id: int):
+    """
+    Emit the feed as a JSON array one task at a time, reading through a server-side cursor.
+    Uses its own session because the request session is closed before the body is sent.
+    """
+    async with AsyncSession(bind=bind) as db:
+        rows = await db.stream(
+            my_tasks_query(user_id).execution_options(yield_per=MY_TASKS_STREAM_BATCH_SIZE)
+        )
+        yield b"["
+        index = 0
+        async for row in rows:
+            yield (b"," if index else b"") + orjson.dumps(TASK_WITH_WORKSPACE_ROW.to_dict(row))
+            index += 1
+        yield b"]"
+
 @router.get("/tasks/me", response_model=List[TaskWithWorkspace])
-def get_my_tasks(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all tasks assigned to the current user across all workspaces.
     Sorted by Priority (P0 first) and Due Date (earliest first).
+    Pass `limit` to page through the feed (next cursor in `X-Next-Cursor`),
+    or `stream=true` to receive the whole feed as an incrementally written JSON array.
     """
-    tasks = db.query(Task).join(Task.workspace).filter(
-        Task.assignee_id == current_user.id
-    ).order_by(
-        Task.priority.asc(), # P0 comes before P1 (lexicographically P0 < P1) if enum is string, let's verify Enum order or definition
-        Task.due_date.asc()
-    ).all()
-    
-    return tasks
+    if stream:
+        if limit is not None or cursor is not None:
+            raise HTTPException(status_code=400, detail="stream cannot be combined with limit or cursor")
+        return StreamingResponse(stream_my_tasks(db.bind, current_user.id), media_type="application/json")
+
+    query = my_tasks_query(current_user.id)
+    if cursor:
+        query = query.where(after_my_tasks_cursor(cursor))
+    if limit is None:
+        return json_response(TASK_WITH_WORKSPACE_ROW.dump(await db.execute(query)))
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.priority.value,
+            last.due_date.isoformat() if last.due_date else None,
+            last.id
+        )
+
+    return json_response(TASK_WITH_WORKSPACE_ROW.dump(rows), response)
+
+@router.get("/tasks/search", response_model=List[TaskWithWorkspace])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    workspace_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over task titles and descriptions in the user's workspaces (or only `workspace_id`).
+    Results are ordered by relevance; the cursor for the next page is returned in `X-Next-Cursor`.
+    """
+    search = task_search_query(db.bind.dialect.name, q, *TASK_WITH_WORKSPACE_ROW.columns)
+    if search is None:
+        return []
+    query, score = search
+
+    # 1. Scope to the caller's memberships
+    query = query.join(
+        WorkspaceMember,
+        and_(WorkspaceMember.workspace_id == Task.workspace_id, WorkspaceMember.user_id == current_user.id)
+    )
+    if workspace_id is not None:
+        query = query.where(Task.workspace_id == workspace_id)
+
+    # 2. Keyset Pagination over (score, id)
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, (int, float), int)
+        query = query.where(or_(score > last_score, and_(score == last_score, Task.id > last_id)))
+
+    rows = (await db.execute(
+        query.add_columns(score).order_by(score.asc(), Task.id.asc()).limit(limit + 1)
+    )).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last[-1], last.id)
+
+    return json_response(TASK_WITH_WORKSPACE_ROW.dump(rows), response)
 
 @router.post("/workspaces/{workspace_id}/tasks", response_model=TaskResponse)
-def create_task(
+async def create_task(
     workspace_id: int,
     task: TaskCreate,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new task in a specific workspace.
     """
     # 1. Validate Access
-    validate_workspace_access(workspace_id, db, current_user.id)
+    await validate_workspace_access(workspace_id, db, current_user.id)
 
     # 2. Create Task
     new_task = Task(
         **task.model_dump(),
-        workspace_id=workspace_id
+        workspace_id=workspace_id,
+        change_seq=await bump_workspace_version(db, workspace_id)
     )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await update_task_counters(db, workspace_id, added=[task_counter_keys(new_task)])
+    await db.commit()
+    await db.refresh(new_task)
 
-    # 3. Broadcast Event
+    # 3. Broadcast Event. The task is encoded once: the same bytes are the response body and,
+    # embedded as a fragment, the event's task (task_id lets the coalescing window find it)
+    task_json = orjson.dumps(TASK_ROW.to_dict([getattr(new_task, name) for name in TASK_ROW.names]))
     background_tasks.add_task(
         manager.broadcast, 
         workspace_id, 
-        {"type": "TASK_CREATED", "task": TaskResponse.model_validate(new_task).model_dump(mode='json')}
+        {"type": "TASK_CREATED", "task_id": new_task.id, "task": orjson.Fragment(task_json)}
     )
 
-    return new_task
+    return json_response(task_json)
 
 @router.get("/workspaces/{workspace_id}/tasks", response_model=List[TaskResponse])
-def list_workspace_tasks(
+async def list_workspace_tasks(
     workspace_id: int,
+    request: Request,
+    response: Response,
     status: Optional[TaskStatus] = Query(None),
     assignee_id: Optional[int] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
     """
-    List tasks in a workspace with optional filters.
+    List tasks in a workspace with optional filters, ordered by id.
+    Pass `limit` to page through the results; the cursor for the next page is
+    returned in the `X-Next-Cursor` header and is absent on the last page.
+    Supports If-None-Match: unchanged workspaces answer 304 without running the list query.
     """
     # 1. Validate Access
-    validate_workspace_access(workspace_id, db, current_user.id)
+    # On the primary: the result is cached, and a lagging replica must not grant or deny access
+    await validate_workspace_access(workspace_id, primary_db, current_user.id)
+
+    etag = make_etag(
+        "tasks", workspace_id, await get_workspace_version(db, workspace_id),
+        status and status.value, assignee_id, limit, cursor
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
     # 2. Query Tasks
-    query = db.query(Task).filter(Task.workspace_id == workspace_id)
+    query = select(*TASK_ROW.columns).where(Task.workspace_id == workspace_id)
     
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if assignee_id:
-        query = query.filter(Task.assignee_id == assignee_id)
-        
-    return query.all()
+        query = query.where(Task.assignee_id == assignee_id)
+
+    # 3. Keyset Pagination (seeks on the composite index instead of scanning with OFFSET)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Task.id > last_id)
+
+    query = query.order_by(Task.id.asc())
+    if limit is None:
+        return json_response(TASK_ROW.dump(await db.execute(query)), response)
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+
+    return json_response(TASK_ROW.dump(rows), response)
+
+# Columns whose old values the counters need, returned by the task writes below
+COUNTED_COLUMNS = (Task.status, Task.priority, Task.assignee_id, Task.due_date)
+
+def bump_task_workspace(task_id: int, user_id: int):
+    """
+    CTE bumping the version of the task's workspace if the user is a member of it, returning the
+    workspace id and new version. Like bump_workspace_version, it locks the workspace row before any
+    task row, the lock order every task writer follows.
+    """
+    return (
+        update(Workspace)
+        .where(
+            Workspace.id == select(Task.workspace_id).where(Task.id == task_id).scalar_subquery(),
+            exists().where(WorkspaceMember.workspace_id == Workspace.id, WorkspaceMember.user_id == user_id)
+        )
+        .values(version=Workspace.version + 1)
+        .returning(Workspace.id, Workspace.version)
+        .cte("bumped")
+    )
+
+async def task_write_denied(db: AsyncSession, task_id: int) -> HTTPException:
+    """
+    Why a task write matched no row: the task is missing or the user is not a member of its workspace.
+    """
+    if await db.scalar(select(Task.id).where(Task.id == task_id)) is None:
+        return HTTPException(status_code=404, detail="Task not found")
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this workspace")
+
+async def update_task_row(db: AsyncSession, task_id: int, user_id: int, values: dict):
+    """
+    Apply `values` to a task in a workspace of the user and bump the workspace version. Returns the
+    TASK_ROW columns after the change followed by the COUNTED_COLUMNS before it, or None if no row matched.
+    On Postgres this is a single UPDATE ... FROM ... RETURNING statement.
+    """
+    if db.bind.dialect.name == "postgresql":
+        bumped = bump_task_workspace(task_id, user_id)
+        # Locking the row re-reads it after any concurrent writer commits, so the old values are current
+        old = (
+            select(Task.id, *COUNTED_COLUMNS, bumped.c.version)
+            .where(Task.id == task_id, Task.workspace_id == bumped.c.id)
+            .with_for_update(of=Task)
+            .cte("old")
+        )
+        return (await db.execute(
+            update(Task)
+            .where(Task.id == old.c.id)
+            .values(**values, change_seq=old.c.version)
+            .returning(*TASK_ROW.columns, *(old.c[column.key] for column in COUNTED_COLUMNS))
+            .execution_options(synchronize_session=False)
+        )).one_or_none()
+
+    # SQLite has no data-modifying CTEs or UPDATE ... FROM in RETURNING: the same steps one by one
+    old = (await db.execute(
+        select(Task.workspace_id, *COUNTED_COLUMNS)
+        .join(WorkspaceMember, and_(WorkspaceMember.workspace_id == Task.workspace_id, WorkspaceMember.user_id == user_id))
+        .where(Task.id == task_id)
+    )).one_or_none()
+    if old is None:
+        return None
+    change_seq = await bump_workspace_version(db, old.workspace_id)
+    new = (await db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(**values, change_seq=change_seq)
+        .returning(*TASK_ROW.columns)
+        .execution_options(synchronize_session=False)
+    )).one()
+    return (*new, *old[1:])
+
+async def delete_task_row(db: AsyncSession, task_id: int, user_id: int):
+    """
+    Delete a task in a workspace of the user and bump the workspace version. Returns the workspace id,
+    the new version and the COUNTED_COLUMNS of the deleted task, or None if no row matched.
+    On Postgres this is a single DELETE ... USING ... RETURNING statement.
+    """
+    if db.bind.dialect.name == "postgresql":
+        bumped = bump_task_workspace(task_id, user_id)
+        return (await db.execute(
+            delete(Task)
+            .where(Task.id == task_id, Task.workspace_id == bumped.c.id)
+            .returning(Task.workspace_id, bumped.c.version, *COUNTED_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )).one_or_none()
+
+    workspace_id = await db.scalar(
+        select(Task.workspace_id)
+        .join(WorkspaceMember, and_(WorkspaceMember.workspace_id == Task.workspace_id, WorkspaceMember.user_id == user_id))
+        .where(Task.id == task_id)
+    )
+    if workspace_id is None:
+        return None
+    change_seq = await bump_workspace_version(db, workspace_id)
+    old = (await db.execute(
+        delete(Task)
+        .where(Task.id == task_id)
+        .returning(*COUNTED_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )).one()
+    return (workspace_id, change_seq, *old)
+
+def counted_keys(values) -> list:
+    return task_counter_keys(SimpleNamespace(**{column.key: value for column, value in zip(COUNTED_COLUMNS, values)}))
 
 @router.patch("/tasks/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int,
     task_update: TaskUpdate,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a task. Verifies user is member of the task's workspace.
     """
-    # 1. Get Task
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    # 2. Validate Access (using task.workspace_id)
-    validate_workspace_access(task.workspace_id, db, current_user.id)
+    # 1. Validate Access and Update Fields, together
+    row = await update_task_row(db, task_id, current_user.id, task_update.model_dump(exclude_unset=True))
+    if row is None:
+        raise await task_write_denied(db, task_id)
+    task_data = TASK_ROW.to_dict(row)
 
-    # 3. Update Fields
-    update_data = task_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(task, key, value)
-
-    db.commit()
-    db.refresh(task)
+    # 2. Counters (a no-op unless a counted column changed)
+    await update_task_counters(
+        db, task_data["workspace_id"],
+        removed=[counted_keys(row[len(TASK_ROW.columns):])], added=[task_counter_keys(SimpleNamespace(**task_data))]
+    )
+    await db.commit()
 
-    # 4. Broadcast Event
+    # 3. Broadcast Event, with the response body as the event's task (see create_task)
+    task_json = orjson.dumps(task_data)
     background_tasks.add_task(
         manager.broadcast, 
-        task.workspace_id, 
-        {"type": "TASK_UPDATED", "task": TaskResponse.model_validate(task).model_dump(mode='json')}
+        task_data["workspace_id"], 
+        {"type": "TASK_UPDATED", "task_id": task_id, "task": orjson.Fragment(task_json)}
     )
 
-    return task
+    return json_response(task_json)
 
 @router.delete("/tasks/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: int,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a task.
     """
-    # 1. Get Task
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    workspace_id = task.workspace_id # Store before delete
+    # 1. Validate Access and Delete, together
+    row = await delete_task_row(db, task_id, current_user.id)
+    if row is None:
+        raise await task_write_denied(db, task_id)
+    workspace_id, change_seq, *old = row
 
-    # 2. Validate Access
-    validate_workspace_access(workspace_id, db, current_user.id)
+    # 2. Counters and Tombstone
+    await update_task_counters(db, workspace_id, removed=[counted_keys(old)])
+    await record_tombstones(db, workspace_id, [task_id], change_seq)
+    await db.commit()
 
-    # 3. Delete
-    db.delete(task)
-    db.commit()
-
-    # 4. Broadcast Event
+    # 3. Broadcast Event
     background_tasks.add_task(
         manager.broadcast, 
         workspace_id, 
@@ -155,3 +423,251 @@ def delete_task(
     )
 
     return {"status": "success", "message": "Task deleted"}
+
+async def load_task_summary(db: AsyncSession, workspace_id: int) -> TaskSummary:
+    counters = await read_task_counters(db, workspace_id)
+    by_status = {task_status: 0 for task_status in TaskStatus}
+    by_status.update(counters.get("status", {}))
+    by_priority = {priority: 0 for priority in TaskPriority}
+    by_priority.update(counters.get("priority", {}))
+    by_assignee = counters.get("assignee", {})
+
+    return TaskSummary(
+        total=sum(by_status.values()),
+        by_status=by_status,
+        by_priority=by_priority,
+        by_assignee={int(key): count for key, count in by_assignee.items() if key},
+        unassigned=by_assignee.get("", 0),
+        overdue=count_overdue(counters.get("due", {}), datetime.utcnow().date())
+    )
+
+@router.get("/workspaces/{workspace_id}/tasks/summary", response_model=TaskSummary)
+async def get_task_summary(
+    workspace_id: int,
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Task counts of a workspace by status, priority and assignee, plus overdue open tasks.
+    Read from the incrementally maintained counters, so the cost does not grow with the board.
+    """
+    # 1. Validate Access
+    await validate_workspace_access(workspace_id, db, current_user.id)
+
+    # Overdue depends on the date as well as on the data
+    etag = make_etag(
+        "summary", workspace_id, await get_workspace_version(db, workspace_id), datetime.utcnow().date()
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # 2. Read Counters
+    return await load_task_summary(db, workspace_id)
+
+@router.post("/workspaces/{workspace_id}/tasks/summary:rebuild", response_model=TaskSummary)
+async def rebuild_task_summary(
+    workspace_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Recount the workspace's tasks from scratch and return the repaired summary. Only ADMINs can rebuild.
+    """
+    # 1. Validate Admin Access
+    member = await validate_workspace_access(workspace_id, db, current_user.id)
+    if member.role != WorkspaceRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Admins can rebuild counters")
+
+    # 2. Rebuild (the version bump also invalidates cached summaries)
+    await bump_workspace_version(db, workspace_id)
+    await rebuild_task_counters(db, workspace_id)
+    await db.commit()
+
+    return await load_task_summary(db, workspace_id)
+
+async def record_tombstones(db: AsyncSession, workspace_id: int, task_ids, change_seq: int) -> None:
+    """
+    Remember deleted task ids for the changes feed. Older tombstones for the same ids are
+    overwritten because SQLite may hand a deleted id out again.
+    """
+    upsert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    statement = upsert(TaskTombstone)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TaskTombstone.task_id],
+        set_={
+            "workspace_id": statement.excluded.workspace_id,
+            "change_seq": statement.excluded.change_seq,
+            "deleted_at": statement.excluded.deleted_at,
+        }
+    )
+    for chunk in chunked(task_ids):
+        await db.execute(statement, [
+            {"task_id": task_id, "workspace_id": workspace_id, "change_seq": change_seq, "deleted_at": datetime.utcnow()}
+            for task_id in chunk
+        ])
+
+@router.get("/workspaces/{workspace_id}/tasks/changes", response_model=TaskChanges)
+async def list_task_changes(
+    workspace_id: int,
+    since: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Tasks created, updated or deleted since the `since` cursor of a previous call.
+    Without `since`, every task is returned along with a cursor to sync from.
+    Apply `tasks` before `deleted`. Answers 410 when the cursor predates tombstone
+    compaction; the client must then reload the full list.
+    """
+    # 1. Validate Access
+    await validate_workspace_access(workspace_id, db, current_user.id)
+
+    version, changes_floor = (await db.execute(
+        select(Workspace.version, Workspace.changes_floor).where(Workspace.id == workspace_id)
+    )).one()
+
+    # 2. Full snapshot for first-time sync
+    if since is None:
+        rows = await db.execute(
+            select(*TASK_ROW.columns).where(Task.workspace_id == workspace_id).order_by(Task.id.asc())
+        )
+        return json_response(orjson.dumps({
+            "tasks": [TASK_ROW.to_dict(row) for row in rows],
+            "deleted": [],
+            "cursor": encode_cursor(workspace_id, version)
+        }))
+
+    cursor_workspace_id, since_seq = decode_cursor(since, int, int)
+    if cursor_workspace_id != workspace_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if since_seq < changes_floor:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Cursor expired, reload all tasks")
+
+    # 3. Rows and tombstones written after the cursor (both seek on (workspace_id, change_seq))
+    rows = (await db.execute(
+        select(*TASK_ROW.columns)
+        .where(Task.workspace_id == workspace_id, Task.change_seq > since_seq)
+        .order_by(Task.change_seq.asc(), Task.id.asc())
+    )).all()
+    deleted_ids = (await db.scalars(
+        select(TaskTombstone.task_id)
+        .where(TaskTombstone.workspace_id == workspace_id, TaskTombstone.change_seq > since_seq)
+        .order_by(TaskTombstone.change_seq.asc(), TaskTombstone.task_id.asc())
+    )).all()
+
+    # A live row always supersedes a tombstone for a reused id
+    live_ids = {row.id for row in rows}
+    return json_response(orjson.dumps({
+        "tasks": [TASK_ROW.to_dict(row) for row in rows],
+        "deleted": [task_id for task_id in deleted_ids if task_id not in live_ids],
+        "cursor": encode_cursor(workspace_id, max(version, since_seq))
+    }))
+
+@router.post("/workspaces/{workspace_id}/tasks:batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    workspace_id: int,
+    batch: TaskBatchRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create, update and delete many tasks of a workspace in a single transaction.
+    Creates run first, then updates, then deletes. Each item gets its own result; ids that
+    do not belong to the workspace are reported as 404 without failing the batch.
+    Subscribers receive one BATCH event for the whole request.
+    """
+    if len(batch.create) + len(batch.update) + len(batch.delete) > TASK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {TASK_BATCH_MAX_ITEMS} items")
+
+    # 1. Validate Access (once for the whole batch)
+    await validate_workspace_access(workspace_id, db, current_user.id)
+
+    results = []
+    events = []
+    # task_counter_keys of every task before and after this batch
+    counted_before = []
+    counted_after = []
+    # Every row written by this batch shares one change sequence
+    change_seq = await bump_workspace_version(db, workspace_id)
+
+    # 2. Create: one multi-row INSERT ... RETURNING, rows come back in parameter order
+    if batch.create:
+        created = await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            [{**item.model_dump(), "workspace_id": workspace_id, "change_seq": change_seq} for item in batch.create]
+        )
+        for index, task in enumerate(created.all()):
+            counted_after.append(task_counter_keys(task))
+            task_data = TaskResponse.model_validate(task)
+            results.append(TaskBatchResult(op="create", index=index, status=201, id=task.id, task=task_data))
+            events.append({"type": "TASK_CREATED", "task": task_data.model_dump(mode='json')})
+
+    # 3. Update: resolve which ids belong to the workspace, then one executemany UPDATE by primary key
+    counted_columns = (Task.id, Task.status, Task.priority, Task.assignee_id, Task.due_date)
+    if batch.update:
+        requested_ids = {item.id for item in batch.update}
+        existing_ids = set()
+        for chunk in chunked(requested_ids):
+            for row in await db.execute(
+                select(*counted_columns).where(Task.workspace_id == workspace_id, Task.id.in_(chunk))
+            ):
+                existing_ids.add(row.id)
+                counted_before.append(task_counter_keys(row))
+
+        now = datetime.utcnow()
+        rows = [
+            {**item.model_dump(exclude_unset=True), "updated_at": now, "change_seq": change_seq}
+            for item in batch.update if item.id in existing_ids
+        ]
+        if rows:
+            await db.execute(update(Task), rows)
+
+        updated = {}
+        for chunk in chunked(existing_ids):
+            for task in await db.scalars(
+                select(Task).where(Task.id.in_(chunk)).execution_options(populate_existing=True)
+            ):
+                counted_after.append(task_counter_keys(task))
+                updated[task.id] = TaskResponse.model_validate(task)
+
+        for index, item in enumerate(batch.update):
+            if item.id in updated:
+                results.append(TaskBatchResult(op="update", index=index, status=200, id=item.id, task=updated[item.id]))
+            else:
+                results.append(TaskBatchResult(op="update", index=index, status=404, id=item.id, error="Task not found"))
+        events.extend(
+            {"type": "TASK_UPDATED", "task": task_data.model_dump(mode='json')} for task_data in updated.values()
+        )
+
+    # 4. Delete: DELETE ... RETURNING reports which ids existed in the workspace
+    if batch.delete:
+        deleted_ids = set()
+        for chunk in chunked(set(batch.delete)):
+            for row in await db.execute(
+                delete(Task)
+                .where(Task.workspace_id == workspace_id, Task.id.in_(chunk))
+                .returning(*counted_columns)
+            ):
+                deleted_ids.add(row.id)
+                counted_before.append(task_counter_keys(row))
+        await record_tombstones(db, workspace_id, deleted_ids, change_seq)
+
+        for index, task_id in enumerate(batch.delete):
+            if task_id in deleted_ids:
+                results.append(TaskBatchResult(op="delete", index=index, status=200, id=task_id))
+            else:
+                results.append(TaskBatchResult(op="delete", index=index, status=404, id=task_id, error="Task not found"))
+        events.extend({"type": "TASK_DELETED", "task_id": task_id} for task_id in sorted(deleted_ids))
+
+    await update_task_counters(db, workspace_id, removed=counted_before, added=counted_after)
+    await db.commit()
+
+    # 5. Broadcast one aggregated event
+    if events:
+        background_tasks.add_task(manager.broadcast, workspace_id, {"type": "BATCH", "events": events})
+
+    return TaskBatchResponse(results=results)
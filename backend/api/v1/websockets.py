@@ -1,39 +1,31 @@
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status, Query
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
 from core.websocket import manager
-from core.config import settings
-from models.user import User
-from models.workspace import WorkspaceMember
-from api.v1.workspaces import validate_workspace_access # We might need to catch the exception or re-implement logic to avoid HTTP exception
+from core.security import Principal
+from api.v1.auth import resolve_principal
+from api.v1.workspaces import validate_workspace_access
 
 router = APIRouter()
 
 async def get_current_user_ws(
     token: str = Query(...), 
-    db: Session = Depends(get_db)
-) -> User:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
-    except JWTError:
-        raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
-        
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    principal = await resolve_principal(token, db)
+    if principal is None:
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
-    return user
+    return principal
 
 @router.websocket("/ws/{workspace_id}")
 async def websocket_endpoint(
     websocket: WebSocket, 
     workspace_id: int, 
     token: str = Query(...),
-    db: Session = Depends(get_db)
+    last_seq: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db)
 ):
     # Authenticate manually since Depends(get_current_user_ws) inside websocket_endpoint signature 
     # might execute before we accept the connection or handle rejection differently.
@@ -43,16 +35,9 @@ async def websocket_endpoint(
     try:
         user = await get_current_user_ws(token, db)
         
-        # Validate Workspace Access
-        # validate_workspace_access raises HTTPException which FastAPI might convert to WS close, 
-        # but let's be explicit.
-        member = db.query(WorkspaceMember).filter(
-            WorkspaceMember.workspace_id == workspace_id,
-            WorkspaceMember.user_id == user.id
-        ).first()
-        
-        if not member:
-            raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
+        # Validate Workspace Access (served from the membership cache on reconnects).
+        # The 403 HTTPException it raises is turned into a policy-violation close below.
+        await validate_workspace_access(workspace_id, db, user.id)
             
     except Exception:
         # If any auth/validation fails, we close (or let FastAPI close it if it was a dependency failure)
@@ -64,12 +49,18 @@ async def websocket_endpoint(
         # To reject:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
+    finally:
+        # Hand the pooled connection back now rather than holding it for the socket's lifetime
+        await db.close()
 
-    await manager.connect(websocket, workspace_id)
+    # Clients resuming after a disconnect pass the `seq` of the last frame they received
+    connection = await manager.connect(websocket, workspace_id, last_seq)
     try:
         while True:
             # We just keep the connection open.
             # We can also handle incoming messages if the frontend sends any (e.g. "ping")
             await websocket.receive_text() 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, workspace_id)
+        pass
+    finally:
+        manager.disconnect(connection)
@@ -1,20 +1,34 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, Request, Response
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from core.database import get_db
+from core.database import chunked, get_db
+from core.etag import make_etag, is_not_modified, not_modified, set_etag
+from core.pagination import encode_cursor, decode_cursor
+from core.security import (
+    Membership, Principal, invalidate_membership, invalidate_memberships, membership_cache
+)
+from core.serialization import Projection, json_response
+from core.websocket import manager
 from models.user import User
 from models.workspace import Workspace, WorkspaceMember, WorkspaceType, WorkspaceRole
-from schemas.workspace import WorkspaceCreate, WorkspaceResponse, WorkspaceMemberInvite, WorkspaceMemberResponse
-from api.v1.auth import get_current_user
+from schemas.workspace import (
+    WorkspaceCreate, WorkspaceResponse, WorkspaceMemberInvite, WorkspaceMemberResponse, UserInfo,
+    WorkspaceMemberBulkInvite, WorkspaceMemberBulkInviteResponse, WorkspaceMemberInviteResult
+)
+from api.v1.auth import get_current_user, get_read_db
 
 router = APIRouter()
 
 @router.post("/", response_model=WorkspaceResponse)
-def create_workspace(
+async def create_workspace(
     workspace: WorkspaceCreate, 
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user), 
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new TEAM workspace. 
@@ -25,81 +39,170 @@ def create_workspace(
         type=WorkspaceType.TEAM, # Explicitly creating a TEAM workspace
         owner_id=current_user.id
     )
-    db.add(new_ws)
-    db.commit()
-    db.refresh(new_ws)
 
-    # Add creator as ADMIN
+    # Add creator as ADMIN, in the same flush (the workspace id comes back from its INSERT) and commit
     member = WorkspaceMember(
-        workspace_id=new_ws.id,
+        workspace=new_ws,
         user_id=current_user.id,
         role=WorkspaceRole.ADMIN
     )
-    db.add(member)
-    db.commit()
+    db.add_all([new_ws, member])
+    await db.commit()
+    invalidate_membership(current_user.id, new_ws.id)
     
     return new_ws
 
 @router.get("/", response_model=List[WorkspaceResponse])
-def list_my_workspaces(
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+async def list_my_workspaces(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user), 
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List all workspaces the current user is a member of.
+    Supports If-None-Match: the ETag covers the (id, version) pairs of those workspaces.
     """
+    versions = (await db.execute(
+        select(Workspace.id, Workspace.version)
+        .join(WorkspaceMember, Workspace.id == WorkspaceMember.workspace_id)
+        .where(WorkspaceMember.user_id == current_user.id)
+        .order_by(Workspace.id)
+    )).all()
+    etag = make_etag("workspaces", current_user.id, *(f"{id}.{version}" for id, version in versions))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     # Join WorkspaceMember to find workspaces for this user
-    workspaces = (
-        db.query(Workspace)
+    workspaces = await db.scalars(
+        select(Workspace)
         .join(WorkspaceMember, Workspace.id == WorkspaceMember.workspace_id)
-        .filter(WorkspaceMember.user_id == current_user.id)
-        .all()
+        .where(WorkspaceMember.user_id == current_user.id)
+    )
+    return workspaces.all()
+
+async def bump_workspace_version(db: AsyncSession, workspace_id: int) -> int:
+    """
+    Mark the workspace's tasks or members as changed and return the new version.
+    Call inside the writing transaction: the row lock it takes orders concurrent writers,
+    which is what lets the version double as the change sequence of the tasks feed.
+    """
+    return await db.scalar(
+        update(Workspace)
+        .where(Workspace.id == workspace_id)
+        .values(version=Workspace.version + 1)
+        .returning(Workspace.version)
     )
-    return workspaces
+
+async def get_workspace_version(db: AsyncSession, workspace_id: int) -> int:
+    return await db.scalar(select(Workspace.version).where(Workspace.id == workspace_id))
 
 # Reusable Dependency for future endpoints (e.g. Tasks)
-def validate_workspace_access(workspace_id: int, db: Session, user_id: int) -> WorkspaceMember:
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_id
-    ).first()
+async def validate_workspace_access(workspace_id: int, db: AsyncSession, user_id: int) -> Membership:
+    """
+    Return the caller's membership or raise 403. Roles (and non-membership) are served from
+    membership_cache; every write to workspace_members must invalidate the affected key.
+    Always pass a primary session: what is read here is cached for every request.
+    """
+    key = (user_id, workspace_id)
+    role = membership_cache.get(key, default=False)
+    if role is False:
+        role = await db.scalar(
+            select(WorkspaceMember.role).where(
+                WorkspaceMember.workspace_id == workspace_id,
+                WorkspaceMember.user_id == user_id
+            )
+        )
+        membership_cache.set(key, role)
     
-    if not member:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Not a member of this workspace"
         )
-    return member
+    return Membership(workspace_id=workspace_id, user_id=user_id, role=role)
+
+# The directory serializes rows straight from these columns (see core/serialization.py)
+MEMBER_ROW = Projection(WorkspaceMemberResponse, WorkspaceMember, user=(UserInfo, User))
+
+def member_directory_key(dialect: str):
+    """
+    Sort and prefix-match key of the member directory. On Postgres it matches ix_users_email_lower.
+    """
+    key = func.lower(User.email)
+    return key.collate("C") if dialect == "postgresql" else key
+
+def like_prefix(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
 
 @router.get("/{workspace_id}/members", response_model=List[WorkspaceMemberResponse])
-def list_workspace_members(
+async def list_workspace_members(
     workspace_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, min_length=1, max_length=254),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
     """
-    List all members of a workspace.
+    List the members of a workspace, ordered by email. `q` keeps the emails starting with it
+    (case-insensitive); pass `limit` to page through them (next cursor in `X-Next-Cursor`).
+    `X-Total-Count` holds the number of matching members, for type-ahead pickers.
+    Supports If-None-Match against the workspace version.
     """
-    validate_workspace_access(workspace_id, db, current_user.id)
-    
-    members = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id
-    ).join(WorkspaceMember.user).all()
-    
-    return members
+    # On the primary: the result is cached, and a lagging replica must not grant or deny access
+    await validate_workspace_access(workspace_id, primary_db, current_user.id)
+
+    etag = make_etag("members", workspace_id, await get_workspace_version(db, workspace_id), q, limit, cursor)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # 1. Filter (the members primary key covers workspace_id, then users are joined by id)
+    key = member_directory_key(db.bind.dialect.name)
+    query = (
+        select(*MEMBER_ROW.columns)
+        .join(WorkspaceMember.user)
+        .where(WorkspaceMember.workspace_id == workspace_id)
+    )
+    if q is not None:
+        query = query.where(key.like(like_prefix(q.lower()), escape="\\"))
+    if limit is None:
+        rows = (await db.execute(query.order_by(key, User.id))).all()
+        response.headers["X-Total-Count"] = str(len(rows))
+        return json_response(MEMBER_ROW.dump(rows), response)
+
+    # 2. Count, then Keyset Pagination over (key, user id)
+    response.headers["X-Total-Count"] = str(await db.scalar(
+        select(func.count()).select_from(query.with_only_columns(WorkspaceMember.user_id).subquery())
+    ))
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, str, int)
+        query = query.where(or_(key > last_key, and_(key == last_key, User.id > last_id)))
+    rows = (await db.execute(query.add_columns(key.label("directory_key")).order_by(key, User.id).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].directory_key, rows[-1].user_id)
+
+    return json_response(MEMBER_ROW.dump(rows), response)
 
 @router.post("/{workspace_id}/members", response_model=WorkspaceMemberResponse)
-def invite_member(
+async def invite_member(
     workspace_id: int,
     invite: WorkspaceMemberInvite,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Invite a user to the workspace. Only ADMINs can invite.
     """
     # 1. Validate Admin Access
-    member = validate_workspace_access(workspace_id, db, current_user.id)
+    member = await validate_workspace_access(workspace_id, db, current_user.id)
     if member.role != WorkspaceRole.ADMIN:
          raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
@@ -107,15 +210,17 @@ def invite_member(
         )
 
     # 2. Check if user exists
-    user_to_add = db.query(User).filter(User.email == invite.email).first()
+    user_to_add = await db.scalar(select(User).where(User.email == invite.email))
     if not user_to_add:
         raise HTTPException(status_code=404, detail="User with this email not found")
 
     # 3. Check if already member
-    existing_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_to_add.id
-    ).first()
+    existing_member = await db.scalar(
+        select(WorkspaceMember).where(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.user_id == user_to_add.id
+        )
+    )
     if existing_member:
         raise HTTPException(status_code=400, detail="User is already a member")
 
@@ -126,23 +231,102 @@ def invite_member(
         role=WorkspaceRole.MEMBER
     )
     db.add(new_member)
-    db.commit()
-    db.refresh(new_member)
+    await bump_workspace_version(db, workspace_id)
+    await db.commit()
+    invalidate_membership(user_to_add.id, workspace_id)
+    # Attach the already loaded user instead of lazy loading it during serialization
+    set_committed_value(new_member, "user", user_to_add)
+    background_tasks.add_task(
+        manager.broadcast,
+        workspace_id,
+        members_added_event([(user_to_add.id, user_to_add.email)], WorkspaceRole.MEMBER)
+    )
     
     return new_member
 
+def members_added_event(users, role: WorkspaceRole) -> dict:
+    return {
+        "type": "MEMBERS_ADDED",
+        "members": [{"user_id": user_id, "email": email, "role": role.value} for user_id, email in users]
+    }
+
+@router.post("/{workspace_id}/members:batch", response_model=WorkspaceMemberBulkInviteResponse)
+async def invite_members(
+    workspace_id: int,
+    invite: WorkspaceMemberBulkInvite,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Invite many users by email in one transaction. Only ADMINs can invite.
+    Every distinct email gets a result; the rest of the batch proceeds past unknown users and
+    existing members. Subscribers receive a single MEMBERS_ADDED event.
+    """
+    # 1. Validate Admin Access (once for the whole batch)
+    member = await validate_workspace_access(workspace_id, db, current_user.id)
+    if member.role != WorkspaceRole.ADMIN:
+         raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Only Admins can invite members"
+        )
+
+    # 2. Resolve users, then their existing memberships, with one IN (...) query each per chunk
+    emails = list(dict.fromkeys(invite.emails))
+    user_ids = {}
+    for chunk in chunked(emails):
+        user_ids.update((await db.execute(select(User.email, User.id).where(User.email.in_(chunk)))).all())
+    already_members = set()
+    for chunk in chunked(user_ids.values()):
+        already_members.update(await db.scalars(
+            select(WorkspaceMember.user_id).where(
+                WorkspaceMember.workspace_id == workspace_id, WorkspaceMember.user_id.in_(chunk)
+            )
+        ))
+
+    results = []
+    added = []
+    for email in emails:
+        user_id = user_ids.get(email)
+        if user_id is None:
+            results.append(WorkspaceMemberInviteResult(email=email, status=404, error="User with this email not found"))
+        elif user_id in already_members:
+            results.append(WorkspaceMemberInviteResult(email=email, status=400, user_id=user_id, error="User is already a member"))
+        else:
+            results.append(WorkspaceMemberInviteResult(email=email, status=200, user_id=user_id))
+            added.append((user_id, email))
+    if not added:
+        return WorkspaceMemberBulkInviteResponse(results=results)
+
+    # 3. Add Members in one INSERT; a concurrent single invite of the same user is not an error
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    for chunk in chunked(added):
+        await db.execute(
+            insert(WorkspaceMember).values([
+                {"workspace_id": workspace_id, "user_id": user_id, "role": WorkspaceRole.MEMBER} for user_id, _ in chunk
+            ]).on_conflict_do_nothing()
+        )
+    await bump_workspace_version(db, workspace_id)
+    await db.commit()
+
+    # 4. Invalidate and Broadcast once for the whole batch
+    invalidate_memberships(workspace_id, *(user_id for user_id, _ in added))
+    background_tasks.add_task(manager.broadcast, workspace_id, members_added_event(added, WorkspaceRole.MEMBER))
+
+    return WorkspaceMemberBulkInviteResponse(results=results)
+
 @router.delete("/{workspace_id}/members/{user_id}")
-def remove_member(
+async def remove_member(
     workspace_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Remove a member from the workspace. Only ADMINs can remove.
     """
     # 1. Validate Admin Access
-    requester = validate_workspace_access(workspace_id, db, current_user.id)
+    requester = await validate_workspace_access(workspace_id, db, current_user.id)
     if requester.role != WorkspaceRole.ADMIN:
          raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
@@ -150,10 +334,12 @@ def remove_member(
         )
     
     # 2. Get Member to remove
-    member_to_remove = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_id
-    ).first()
+    member_to_remove = await db.scalar(
+        select(WorkspaceMember).where(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.user_id == user_id
+        )
+    )
     
     if not member_to_remove:
         raise HTTPException(status_code=404, detail="Member not found")
@@ -163,7 +349,9 @@ def remove_member(
     # For now, let's just allow it, but maybe prevent removing self via this specific endpoint if we want explicit 'leave' logic separately.
     # Requirement says "Remove a member". 
     
-    db.delete(member_to_remove)
-    db.commit()
+    await db.delete(member_to_remove)
+    await bump_workspace_version(db, workspace_id)
+    await db.commit()
+    invalidate_membership(user_id, workspace_id)
     
     return {"status": "success", "message": "Member removed"}
@@ -0,0 +1,94 @@
+"""
+CPU cost of one broadcast to 1,000 subscribers: encoding per recipient (the previous
+`send_json` loop) versus encoding once and sharing the frame (ConnectionManager.broadcast).
+
+Usage (from backend/):
+    python -m benchmarks.broadcast_encoding --recipients 1000 --rounds 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from core.websocket import ClientConnection, ConnectionManager
+# Import all models to ensure they are registered with Base.metadata
+from models.user import User
+from models.workspace import Workspace
+from models.task import Task, TaskPriority, TaskStatus
+from schemas.task import TaskResponse
+
+
+class NullWebSocket:
+    """
+    Accepts frames without doing any I/O, so only the broadcast path itself is measured.
+    """
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        pass
+
+    async def send_json(self, data):
+        # Mirrors Starlette's WebSocket.send_json
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+
+def sample_message() -> dict:
+    task = Task(
+        id=42, title="Ship the release", description="Final checks " * 20,
+        status=TaskStatus.IN_PROGRESS, priority=TaskPriority.P1, workspace_id=1, assignee_id=7,
+        due_date=datetime(2026, 11, 1), created_at=datetime(2026, 10, 1), updated_at=datetime(2026, 10, 18),
+    )
+    return {"type": "TASK_UPDATED", "task": TaskResponse.model_validate(task).model_dump(mode="json")}
+
+
+async def per_recipient(sockets, message, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        for websocket in sockets:
+            await websocket.send_json(message)
+    return (time.process_time() - start) / rounds
+
+
+async def encode_once(manager: ConnectionManager, connections, message, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        await manager.broadcast(1, message)
+        # Drain the queues the way the writer tasks would, sending the shared frame
+        for connection in connections:
+            await connection.websocket.send_text(connection.queue.get_nowait())
+    return (time.process_time() - start) / rounds
+
+
+async def run(recipients: int, rounds: int):
+    message = sample_message()
+    sockets = [NullWebSocket() for _ in range(recipients)]
+
+    manager = ConnectionManager()
+    connections = []
+    for websocket in sockets:
+        # Register without starting writer tasks so the benchmark drains deterministically
+        connection = ClientConnection(websocket, 1)
+        manager.active_connections.setdefault(1, set()).add(connection)
+        connections.append(connection)
+
+    before = await per_recipient(sockets, message, rounds)
+    after = await encode_once(manager, connections, message, rounds)
+    print(f"recipients: {recipients}")
+    print(f"encode per recipient: {before * 1000:8.3f} ms CPU per broadcast")
+    print(f"encode once:          {after * 1000:8.3f} ms CPU per broadcast")
+    print(f"saved:                {(before - after) * 1000:8.3f} ms CPU per broadcast ({before / after:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.recipients, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
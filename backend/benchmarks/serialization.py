@@ -0,0 +1,116 @@
+"""
+Cost of serializing a 10k-task list: the ORM + response_model path the list endpoints used
+(load Task objects, FastAPI validates them into TaskResponse, JSONResponse encodes the dicts)
+versus the column projection they use now (load plain rows, encode straight to JSON with orjson).
+
+Usage (from backend/):
+    python -m benchmarks.serialization --tasks 10000 --rounds 10
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from api.v1.tasks import TASK_ROW
+from core.database import Base
+# Import all models to ensure they are registered with Base.metadata
+from models.user import User
+from models.workspace import Workspace, WorkspaceType
+from models.task import Task, TaskPriority, TaskStatus
+from schemas.task import TaskResponse
+
+
+async def seed(db: AsyncSession, tasks: int):
+    db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    db.add(Workspace(id=1, name="Bench", type=WorkspaceType.TEAM, owner_id=1))
+    await db.flush()
+    now = datetime(2026, 10, 18, 12, 0, 0, 123456)
+    await db.execute(insert(Task), [
+        {
+            "title": f"Task {i}", "description": "Some details about the task " * 4,
+            "status": list(TaskStatus)[i % 4], "priority": list(TaskPriority)[i % 4],
+            "workspace_id": 1, "assignee_id": 1 if i % 3 else None,
+            "due_date": now + timedelta(days=i % 30) if i % 2 else None,
+            "created_at": now, "updated_at": now,
+        }
+        for i in range(tasks)
+    ])
+    await db.commit()
+
+
+async def timed(rounds: int, step):
+    load = serialize = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        rows = await step.load()
+        loaded = time.perf_counter()
+        body = await step.serialize(rows)
+        load += loaded - start
+        serialize += time.perf_counter() - loaded
+    return load / rounds, serialize / rounds, body
+
+
+class Before:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.field = create_model_field("Response_list_workspace_tasks", List[TaskResponse], mode="serialization")
+
+    async def load(self):
+        self.db.expunge_all()
+        return (await self.db.scalars(select(Task).order_by(Task.id))).all()
+
+    async def serialize(self, rows):
+        content = await serialize_response(field=self.field, response_content=rows)
+        return JSONResponse(content).body
+
+
+class After:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def load(self):
+        return (await self.db.execute(select(*TASK_ROW.columns).order_by(Task.id))).all()
+
+    async def serialize(self, rows):
+        return TASK_ROW.dump(rows)
+
+
+async def run(tasks: int, rounds: int):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await seed(db, tasks)
+        before = await timed(rounds, Before(db))
+        after = await timed(rounds, After(db))
+    await engine.dispose()
+
+    assert before[2] == after[2], "the projection must produce the same JSON"
+    print(f"tasks: {tasks}, response: {len(after[2]) / 1024:.0f} KiB")
+    for label, (load, serialize, _) in (("response_model", before), ("projection", after)):
+        print(
+            f"{label:15} load {load * 1000:7.1f} ms  serialize {serialize * 1000:7.1f} ms  "
+            f"({serialize / tasks * 1e6:5.2f} us/row)  total {(load + serialize) * 1000:7.1f} ms"
+        )
+    print(f"serialization speedup: {before[1] / after[1]:.1f}x, end to end: {sum(before[:2]) / sum(after[:2]):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 import os
+from typing import Optional
+
+def _optional_int(value: str) -> Optional[int]:
+    return None if value.strip().lower() in ("", "none") else int(value)
 
 class Settings:
     PROJECT_NAME: str = "Nexus Tasks"
@@ -12,9 +16,66 @@ class Settings:
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     
     DATABASE_URL = f"postgresql+psycopg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    # Read-only endpoints query this replica when set; clients whose X-Last-Write is younger than
+    # READ_YOUR_WRITES_SECONDS keep reading from the primary
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+    # Connection pool of each engine (primary and replica), per worker
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    # Test connections on checkout and replace them after this long (-1 never), to survive failovers and idle timeouts
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    # psycopg prepares a statement server-side once a connection ran it this many times;
+    # "none" disables prepared statements, as PgBouncer in transaction mode requires
+    DB_PREPARE_THRESHOLD: Optional[int] = _optional_int(os.getenv("DB_PREPARE_THRESHOLD", "5"))
     
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Password hashing runs in its own process pool so login bursts cannot starve the API
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # Hash requests beyond this many in flight are shed with a 503
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+    # Shared secret for POST /auth/provision (bulk SSO/SCIM imports), sent as X-Provisioning-Token; empty disables it
+    PROVISIONING_TOKEN: str = os.getenv("PROVISIONING_TOKEN", "")
+
+    # Verified tokens are cached in-process for up to this long (never past their exp).
+    # Deactivations reach the other workers over the event bus; one that misses the message
+    # (e.g. while its bus reconnects) keeps accepting the user's tokens for at most this long
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+    # Workspace roles per (user_id, workspace_id). Changes reach the other workers over the event bus;
+    # the TTL bounds how stale a worker that misses the message can be
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+    MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "50000"))
+
+    # Each WebSocket gets a bounded outbound queue; clients that overflow it or stall a send are evicted
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    WS_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+    # Collect a workspace's events for this long and send them as one BATCH frame (0 disables)
+    WS_COALESCE_MS: int = int(os.getenv("WS_COALESCE_MS", "0"))
+    # Recent frames kept per workspace so reconnecting clients can resume with last_seq
+    WS_REPLAY_BUFFER_SIZE: int = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "256"))
+    WS_REPLAY_BUFFER_BYTES: int = int(os.getenv("WS_REPLAY_BUFFER_BYTES", str(1024 * 1024)))
+    # Larger frames (e.g. a big tasks:batch) are never buffered; clients that missed one must resync
+    WS_REPLAY_MAX_FRAME_BYTES: int = int(os.getenv("WS_REPLAY_MAX_FRAME_BYTES", str(64 * 1024)))
+    WS_REPLAY_MAX_WORKSPACES: int = int(os.getenv("WS_REPLAY_MAX_WORKSPACES", "10000"))
+    # A workspace's buffer is dropped once it has had no subscriber on this worker for this long
+    WS_REPLAY_IDLE_SECONDS: float = float(os.getenv("WS_REPLAY_IDLE_SECONDS", "300"))
+
+    # How broadcasts reach sockets held by other workers: "memory" (single process) or "postgres" (LISTEN/NOTIFY)
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "memory")
+    EVENT_BUS_CHANNEL: str = os.getenv("EVENT_BUS_CHANNEL", "nexus_events")
+
+    # Deletion tombstones older than this are compacted; clients syncing from before then must resync
+    TASK_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30"))
+    TOMBSTONE_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("TOMBSTONE_COMPACTION_INTERVAL_SECONDS", "3600"))
+
 settings = Settings()
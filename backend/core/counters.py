@@ -0,0 +1,104 @@
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import String, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.task import Task, TaskCounter, TaskStatus, TaskPriority
+
+CounterKey = Tuple[str, str]
+
+def task_counter_keys(task) -> List[CounterKey]:
+    """
+    The (dimension, key) counters a task contributes to. Accepts a Task or any row with its columns.
+    Open tasks with a due date are also counted under their due day, from which overdue is derived.
+    """
+    task_status = TaskStatus(task.status)
+    keys = [
+        ("status", task_status.value),
+        ("priority", TaskPriority(task.priority).value),
+        ("assignee", "" if task.assignee_id is None else str(task.assignee_id)),
+    ]
+    if task.due_date is not None and task_status != TaskStatus.DONE:
+        keys.append(("due", task.due_date.date().isoformat()))
+    return keys
+
+async def update_task_counters(
+    db: AsyncSession,
+    workspace_id: int,
+    removed: Iterable[List[CounterKey]] = (),
+    added: Iterable[List[CounterKey]] = ()
+) -> None:
+    """
+    Apply the net change of a write as one upsert. `removed` and `added` hold the
+    task_counter_keys of each task before and after it. Call inside the writing transaction.
+    """
+    deltas = Counter()
+    for keys in removed:
+        deltas.subtract(keys)
+    for keys in added:
+        deltas.update(keys)
+
+    rows = [
+        {"workspace_id": workspace_id, "dimension": dimension, "key": key, "count": delta}
+        for (dimension, key), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(TaskCounter)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TaskCounter.workspace_id, TaskCounter.dimension, TaskCounter.key],
+        set_={"count": TaskCounter.count + statement.excluded["count"]}
+    )
+    await db.execute(statement, rows)
+
+async def rebuild_task_counters(db: AsyncSession, workspace_id: int) -> None:
+    """
+    Recount a workspace's tasks from scratch, for repairing drifted counters. Does not commit.
+    """
+    dimensions = {
+        "status": Task.status,
+        "priority": Task.priority,
+        "assignee": func.coalesce(cast(Task.assignee_id, String), ""),
+        "due": cast(func.date(Task.due_date), String),
+    }
+    rows = []
+    for dimension, column in dimensions.items():
+        query = select(column, func.count()).where(Task.workspace_id == workspace_id).group_by(column)
+        if dimension == "due":
+            query = query.where(Task.due_date.is_not(None), Task.status != TaskStatus.DONE)
+        for key, count in await db.execute(query):
+            rows.append({
+                "workspace_id": workspace_id,
+                "dimension": dimension,
+                "key": getattr(key, "value", key),
+                "count": count
+            })
+
+    await db.execute(delete(TaskCounter).where(TaskCounter.workspace_id == workspace_id))
+    if rows:
+        await db.execute(TaskCounter.__table__.insert(), rows)
+
+async def read_task_counters(db: AsyncSession, workspace_id: int) -> Dict[str, Dict[str, int]]:
+    """
+    All non-zero counters of a workspace as {dimension: {key: count}}.
+    """
+    counters: Dict[str, Dict[str, int]] = {}
+    for dimension, key, count in await db.execute(
+        select(TaskCounter.dimension, TaskCounter.key, TaskCounter.count)
+        .where(TaskCounter.workspace_id == workspace_id, TaskCounter.count != 0)
+    ):
+        counters.setdefault(dimension, {})[key] = count
+    return counters
+
+def count_overdue(due_counts: Dict[str, int], today: date) -> int:
+    """
+    Open tasks whose due day is before today (due days are ISO dates, so they compare as strings).
+    """
+    today = today.isoformat()
+    return sum(count for day, count in due_counts.items() if day < today)
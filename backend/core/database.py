@@ -1,15 +1,146 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from contextvars import ContextVar
+from itertools import islice
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from core.config import settings
+from core.metrics import Gauge, Histogram, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a pooled connection, including waiting for one and connecting."
+)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    The default async queue pool, timing every checkout.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    """
+    An instrumented engine with the pool and driver options from settings.
+    """
+    connect_args = {}
+    if make_url(url).get_driver_name() == "psycopg":
+        connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        connect_args=connect_args,
+    )
+    instrument_engine(engine)
+    return engine
+
+# psycopg3 serves both the sync (Alembic) and async (API) drivers from the same URL
+engine = create_pooled_engine(settings.DATABASE_URL)
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Response header with the time (unix seconds) of the request's last commit. Clients send it back on
+# later requests, so read-your-writes holds whichever worker serves them
+LAST_WRITE_HEADER = "X-Last-Write"
+
+class ReadReplica:
+    """
+    Sessions for read-only endpoints. Clients whose last write (see LAST_WRITE_HEADER) is less than
+    READ_YOUR_WRITES_SECONDS old are kept on the primary, so a lagging replica never hides it from them.
+    """
+
+    def __init__(self, url: str):
+        self.engine: Optional[AsyncEngine] = create_pooled_engine(url) if url else None
+        self.sessionmaker: Optional[async_sessionmaker] = None
+        if self.engine is not None:
+            self.sessionmaker = async_sessionmaker(
+                bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+            )
+
+    def serves(self, last_write: Optional[float]) -> bool:
+        return self.sessionmaker is not None and (
+            last_write is None or time.time() - last_write >= settings.READ_YOUR_WRITES_SECONDS
+        )
+
+read_replica = ReadReplica(settings.DATABASE_REPLICA_URL)
+
+class RequestWrites:
+    __slots__ = ("committed_at",)
+
+    def __init__(self):
+        self.committed_at: Optional[float] = None
+
+# Commits of the request being served, visible to the after_commit hook (it runs in the same context)
+current_writes: ContextVar[Optional[RequestWrites]] = ContextVar("current_writes", default=None)
+
+@event.listens_for(Session, "after_commit")
+def _record_commit(session):
+    writes = current_writes.get()
+    if writes is not None:
+        writes.committed_at = time.time()
+
+class ReadYourWritesMiddleware:
+    """
+    Adds LAST_WRITE_HEADER to the responses of requests that committed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes = RequestWrites()
+        token = current_writes.set(writes)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes.committed_at is not None:
+                header = (LAST_WRITE_HEADER.lower().encode(), f"{writes.committed_at:.3f}".encode())
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_writes.reset(token)
+
+def pool_stats():
+    stats = {}
+    for database, pooled in (("primary", engine), ("replica", read_replica.engine)):
+        if pooled is None:
+            continue
+        pool = pooled.pool
+        stats[(database, "size")] = pool.size()
+        stats[(database, "checked_out")] = pool.checkedout()
+        stats[(database, "idle")] = pool.checkedin()
+        stats[(database, "overflow")] = max(pool.overflow(), 0)
+    return stats
+
+Gauge("db_pool_connections", "Connections of the API's pools, by state.", ("database", "state"), collect=pool_stats)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Values per IN (...) or multi-row statement, well under the bind parameter limits of SQLite and Postgres
+IN_CHUNK_SIZE = 5000
+
+def chunked(values, size: int = IN_CHUNK_SIZE):
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
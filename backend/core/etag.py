@@ -0,0 +1,28 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag over the values that fully determine a response (e.g. workspace version and query params).
+    """
+    digest = hashlib.sha1(":".join(map(str, parts)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    # Let browsers keep the body but always revalidate it
+    response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
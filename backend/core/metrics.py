@@ -0,0 +1,228 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond queries to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+class Metric:
+    """
+    Base of the in-process metrics exported by /metrics in the Prometheus text format.
+    Updates are plain dict and list operations on the event loop thread, cheap enough for every request.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name}{labels} {value}" for name, labels, value in self.samples())
+        return lines
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Gauge(Metric):
+    """
+    A value read at scrape time from `collect`, which returns {label values: value}.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in (self.collect() if self.collect else {}).items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (last is +Inf), sum]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _format_labels(self.labelnames + ("le",), labels + (le,)), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative
+
+REGISTRY: List[Metric] = []
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.",
+    ("method", "route", "status")
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Duration of each SQL statement, by the route that issued it.", ("route",)
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed while serving one request.", ("route",),
+    buckets=QUERY_COUNT_BUCKETS
+)
+
+class RequestStats:
+    __slots__ = ("scope", "queries")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+
+    @property
+    def route(self) -> str:
+        # Routing stores the matched route in the scope before any dependency runs
+        route = self.scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+# Stats of the request being served, visible to the SQLAlchemy hooks (they run in the same context)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+class MetricsMiddleware:
+    """
+    Records latency per route template (never the raw path, which would explode label cardinality)
+    and the number of SQL statements each request ran.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = "500"
+        finished = None
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Latency ends at the last body byte, so background tasks run after it are not counted
+            route = stats.route
+            http_request_duration.observe((finished or time.perf_counter()) - start, scope["method"], route, status)
+            db_queries_per_request.observe(stats.queries, route)
+            current_request.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, which dies with the statement: after_cursor_execute does not run
+    # for statements that raise, and anything kept on the connection would outlive them
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    elapsed = time.perf_counter() - start if start is not None else None
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        route = stats.route
+    else:
+        route = "background"
+    if elapsed is not None:
+        db_query_duration.observe(elapsed, route)
+
+def instrument_engine(engine) -> None:
+    """
+    Time every statement run through `engine` (sync or async) and count it against the current request.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryLog:
+    """
+    Statements seen by `count_queries`, in execution order.
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+@contextmanager
+def count_queries(engine) -> Iterator[QueryLog]:
+    """
+    Record every statement `engine` runs inside the block, from any task or thread.
+    Meant for tests and benchmarks; production code reads the per-request counts above.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    log = QueryLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    event.listen(sync_engine, "after_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        event.remove(sync_engine, "after_cursor_execute", record)
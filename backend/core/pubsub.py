@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import orjson
+import psycopg
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, dict], Awaitable[None]]
+
+class EventBus:
+    """
+    Carries workspace broadcasts between API workers. Every worker subscribes with a
+    `deliver` callback that fans a message out to its own sockets; publish() hands a
+    message to every *other* worker, the publishing worker delivers locally by itself.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._deliver: Optional[Deliver] = None
+        # Cross-worker delivery latency samples (seconds), most recent last
+        self._latencies: deque = deque(maxlen=1024)
+        self.published = 0
+        self.received = 0
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    async def publish(self, workspace_id: int, message: dict) -> None:
+        self.published += 1
+        await self._send_remote({"o": self.origin, "w": workspace_id, "t": time.time(), "m": message})
+
+    async def _send_remote(self, envelope: dict) -> None:
+        raise NotImplementedError
+
+    async def _receive_remote(self, envelope: dict) -> None:
+        if envelope["o"] == self.origin or self._deliver is None:
+            return
+        self.received += 1
+        self._latencies.append(max(time.time() - envelope["t"], 0.0))
+        await self._deliver(envelope["w"], envelope["m"])
+
+    def stats(self) -> Dict[str, float]:
+        samples = sorted(self._latencies)
+        def percentile(p: float) -> float:
+            return samples[min(int(len(samples) * p), len(samples) - 1)] * 1000 if samples else 0.0
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "latency_p50_ms": percentile(0.50),
+            "latency_p99_ms": percentile(0.99),
+        }
+
+class InMemoryHub:
+    """
+    Stands in for the shared backend: buses attached to the same hub behave like workers
+    listening on the same channel.
+    """
+
+    def __init__(self):
+        self.buses: List["InMemoryEventBus"] = []
+
+class InMemoryEventBus(EventBus):
+    """
+    Single-process backend, used by default and in tests. Pass a shared InMemoryHub to
+    simulate several workers inside one process.
+    """
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        super().__init__()
+        self.hub = hub or InMemoryHub()
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self.hub.buses.append(self)
+
+    async def stop(self) -> None:
+        if self in self.hub.buses:
+            self.hub.buses.remove(self)
+        await super().stop()
+
+    async def _send_remote(self, envelope: dict) -> None:
+        for bus in list(self.hub.buses):
+            await bus._receive_remote(envelope)
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY on the application database, so no extra infrastructure is needed.
+    NOTIFY payloads are capped at 8000 bytes; larger envelopes are split into numbered
+    chunks and reassembled by the listeners.
+    """
+
+    MAX_PAYLOAD_BYTES = 7900
+    # Characters per chunk: even at 4 bytes per character (or 2 for an escaped quote once
+    # wrapped) a chunk stays below MAX_PAYLOAD_BYTES
+    CHUNK_CHARS = 1750
+    # Incomplete chunked messages older than this are dropped
+    CHUNK_TTL_SECONDS = 30
+    RECONNECT_DELAY_SECONDS = 1
+
+    def __init__(self, database_url: str, channel: str):
+        super().__init__()
+        self.conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._listen_conn = None
+        self._notify_conn = None
+        self._notify_lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._partial: Dict[str, dict] = {}
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self._notify_conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None:
+                await conn.close()
+        await super().stop()
+
+    async def _send_remote(self, envelope: dict) -> None:
+        payload = orjson.dumps(envelope).decode("utf-8")
+        if len(payload.encode("utf-8")) <= self.MAX_PAYLOAD_BYTES:
+            parts = [payload]
+        else:
+            chunk_id = uuid.uuid4().hex
+            pieces = [payload[i:i + self.CHUNK_CHARS] for i in range(0, len(payload), self.CHUNK_CHARS)]
+            parts = [
+                orjson.dumps({"c": chunk_id, "i": index, "n": len(pieces), "d": piece}).decode("utf-8")
+                for index, piece in enumerate(pieces)
+            ]
+
+        try:
+            # One connection keeps chunks of a message in order
+            async with self._notify_lock:
+                if self._notify_conn.closed:
+                    self._notify_conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+                for part in parts:
+                    await self._notify_conn.execute("SELECT pg_notify(%s, %s)", (self.channel, part))
+        except Exception:
+            logger.exception("Failed to publish workspace %s event to other workers", envelope["w"])
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                self._listen_conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+                await self._listen_conn.execute(f'LISTEN "{self.channel}"')
+                async for notify in self._listen_conn.notifies():
+                    try:
+                        envelope = self._reassemble(orjson.loads(notify.payload))
+                        if envelope is not None:
+                            await self._receive_remote(envelope)
+                    except Exception:
+                        logger.exception("Dropping malformed event bus notification")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Events published while disconnected are lost; clients recover on their next fetch
+                logger.exception("Event bus listener lost its connection, reconnecting")
+                if self._listen_conn is not None:
+                    try:
+                        await self._listen_conn.close()
+                    except Exception:
+                        pass
+                    self._listen_conn = None
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _reassemble(self, data: dict) -> Optional[dict]:
+        if "c" not in data:
+            return data
+
+        now = time.monotonic()
+        for chunk_id in [key for key, entry in self._partial.items() if now - entry["at"] > self.CHUNK_TTL_SECONDS]:
+            del self._partial[chunk_id]
+
+        entry = self._partial.setdefault(data["c"], {"at": now, "parts": {}})
+        entry["parts"][data["i"]] = data["d"]
+        if len(entry["parts"]) < data["n"]:
+            return None
+        del self._partial[data["c"]]
+        return orjson.loads("".join(entry["parts"][i] for i in range(data["n"])))
+
+def create_event_bus() -> EventBus:
+    """
+    Build the backend selected by EVENT_BUS_BACKEND.
+    """
+    if settings.EVENT_BUS_BACKEND == "postgres":
+        return PostgresEventBus(settings.DATABASE_URL, settings.EVENT_BUS_CHANNEL)
+    if settings.EVENT_BUS_BACKEND == "memory":
+        return InMemoryEventBus()
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND: {settings.EVENT_BUS_BACKEND}")
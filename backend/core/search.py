@@ -0,0 +1,47 @@
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.task import Task
+
+# FTS5 external-content table created by TASK_SEARCH_DDL on SQLite
+tasks_fts = table("tasks_fts", column("rowid"))
+
+def fts5_query(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression: every word must appear, and the last one may be a prefix.
+    Words are quoted so user input can never be parsed as FTS5 syntax.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+def task_search_query(dialect: str, q: str, *columns) -> Optional[Tuple[Select, ColumnElement]]:
+    """
+    The given columns of the tasks matching `q` (joined to their workspace) and a score expression
+    where lower is a better match. Returns None when `q` cannot match anything. Relies on the
+    indexes in TASK_SEARCH_DDL.
+    """
+    query = select(*columns).join(Task.workspace)
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal_column("'english'"), q)
+        search_vector = literal_column("tasks.search_vector")
+        # ts_rank grows with relevance; negate it so every backend sorts ascending
+        score = -func.ts_rank(search_vector, tsquery)
+        return query.where(search_vector.op("@@")(tsquery)), score
+
+    match = fts5_query(q)
+    if match is None:
+        return None
+    # bm25 is already lower-is-better; title matches weigh ten times description matches
+    score = func.bm25(literal_column("tasks_fts"), 10.0, 1.0)
+    query = (
+        query.join(tasks_fts, tasks_fts.c.rowid == Task.id)
+        .where(literal_column("tasks_fts").op("MATCH")(match))
+    )
+    return query, score
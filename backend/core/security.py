@@ -1,15 +1,59 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import hashlib
+import multiprocessing
 import bcrypt
-from typing import Union
+from typing import Callable, List, Optional, Union
+from fastapi import HTTPException, status
 from jose import jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from core.cache import LRUCache
 from core.config import settings
+from models.user import User
+from models.workspace import WorkspaceRole
 
 
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated caller. A plain value object so it can be cached across requests and sessions.
+    """
+    id: int
+    email: str
+    is_active: bool
+
+
+# Keyed by token digest; entries never outlive the token's exp claim
+principal_cache = LRUCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class Membership:
+    """
+    A user's role in a workspace, as cached by membership_cache.
+    """
+    workspace_id: int
+    user_id: int
+    role: WorkspaceRole
+
+
+# Keyed by (user_id, workspace_id); holds the role, or None for "not a member"
+membership_cache = LRUCache(maxsize=settings.MEMBERSHIP_CACHE_SIZE, ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+
+
+# Stored for provisioned accounts without a password (they sign in through SSO); never matches
+UNUSABLE_PASSWORD = "!"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password.
     """
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
     password_hash = hashlib.sha256(plain_password.encode('utf-8')).hexdigest()
     
     return bcrypt.checkpw(
@@ -23,11 +67,76 @@ def get_password_hash(password: str) -> str:
     """
     password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
     
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_hash.encode('utf-8'), salt)
     
     return hashed.decode('utf-8')
 
+_hasher_pool: Optional[ProcessPoolExecutor] = None
+_hasher_pending = 0
+
+def _get_hasher_pool() -> ProcessPoolExecutor:
+    global _hasher_pool
+    if _hasher_pool is None:
+        # spawn rather than fork: the parent has an event loop and DB driver threads running
+        _hasher_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hasher_pool
+
+async def _run_in_hasher_pool(fn, *args):
+    global _hasher_pending
+    if _hasher_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        # Shed load immediately instead of queueing behind seconds of bcrypt work
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    _hasher_pending += 1
+    try:
+        # A worker that died (OOM-killed, segfault) breaks the whole pool: replace it and retry once
+        for _ in range(2):
+            pool = _get_hasher_pool()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                _discard_hasher_pool(pool)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is unavailable, please retry",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        _hasher_pending -= 1
+
+def _discard_hasher_pool(pool: ProcessPoolExecutor) -> None:
+    global _hasher_pool
+    # Concurrent callers see the same failure; only the first replaces the pool
+    if _hasher_pool is pool:
+        _hasher_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password on the password hashing pool. Raises a 503 when the pool is saturated.
+    """
+    return await _run_in_hasher_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    get_password_hash on the password hashing pool. Raises a 503 when the pool is saturated.
+    """
+    return await _run_in_hasher_pool(get_password_hash, password)
+
+def shutdown_password_hasher() -> None:
+    global _hasher_pool
+    if _hasher_pool is not None:
+        _hasher_pool.shutdown(cancel_futures=True)
+        _hasher_pool = None
+
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     """
     Create a JWT access token.
@@ -41,3 +150,65 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+def token_digest(token: str) -> str:
+    """
+    Cache key for a bearer token, so raw tokens are never kept in memory longer than the request.
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def invalidate_user_principals(user_id: int) -> None:
+    """
+    Forget every cached token of a user on this worker, e.g. after deactivation.
+    """
+    principal_cache.invalidate_where(lambda _, principal: principal.id == user_id)
+
+def invalidate_membership(user_id: int, workspace_id: int) -> None:
+    invalidate_memberships(workspace_id, user_id)
+
+def invalidate_memberships(workspace_id: int, *user_ids: int) -> None:
+    """
+    Forget the cached roles of users in a workspace, here and (over the event bus) on every other worker.
+    """
+    if user_ids:
+        _invalidate({"type": "MEMBERSHIPS_CHANGED", "workspace_id": workspace_id, "user_ids": sorted(set(user_ids))})
+
+def invalidate_user_memberships(*user_ids: int) -> None:
+    if user_ids:
+        _invalidate({"type": "USER_MEMBERSHIPS_CHANGED", "user_ids": sorted(set(user_ids))})
+
+# Called with every cache invalidation made on this worker; core.websocket registers here to send
+# them over the event bus, and the other workers apply them with apply_invalidation()
+on_invalidation: List[Callable[[dict], None]] = []
+
+def apply_invalidation(message: dict) -> None:
+    """
+    Drop the cached entries an invalidation message names, on this worker only.
+    """
+    if message["type"] == "USERS_DEACTIVATED":
+        for user_id in message["user_ids"]:
+            invalidate_user_principals(user_id)
+    elif message["type"] == "MEMBERSHIPS_CHANGED":
+        for user_id in message["user_ids"]:
+            membership_cache.invalidate((user_id, message["workspace_id"]))
+    elif message["type"] == "USER_MEMBERSHIPS_CHANGED":
+        user_ids = set(message["user_ids"])
+        membership_cache.invalidate_where(lambda key, _: key[0] in user_ids)
+
+def _invalidate(message: dict) -> None:
+    apply_invalidation(message)
+    for callback in on_invalidation:
+        callback(message)
+
+@event.listens_for(User.is_active, "set")
+def _track_deactivation(target, value, oldvalue, initiator):
+    session = Session.object_session(target)
+    if session is not None and not value:
+        session.info.setdefault("deactivated_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_deactivated_users(session):
+    # Invalidate after commit so a concurrent request cannot re-cache the still-active row
+    user_ids = session.info.pop("deactivated_user_ids", None)
+    if user_ids:
+        _invalidate({"type": "USERS_DEACTIVATED", "user_ids": sorted(user_ids)})
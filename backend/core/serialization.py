@@ -0,0 +1,47 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+class Projection:
+    """
+    Serializes query rows straight to JSON in the shape of a response schema, skipping ORM object
+    construction and pydantic validation. Select `columns` (in order), optionally followed by extra
+    columns, and pass the rows to `to_dict` / `dump`. Nested schemas map to the columns of a joined
+    entity, e.g. Projection(TaskWithWorkspace, Task, workspace=(WorkspaceInfo, Workspace)).
+
+    Column values must already be JSON-ready for orjson (str enums, naive datetimes, numbers), which
+    holds for the plain column types used by the task schemas.
+    """
+
+    def __init__(self, model: Type[BaseModel], entity, **nested: Tuple[Type[BaseModel], Any]):
+        self.names = [name for name in model.model_fields if name not in nested]
+        self.columns = [getattr(entity, name) for name in self.names]
+        self.nested: List[Tuple[str, List[str], int]] = []
+        for name, (nested_model, nested_entity) in nested.items():
+            nested_names = list(nested_model.model_fields)
+            self.nested.append((name, nested_names, len(self.columns)))
+            # Labelled so they never collide with the outer entity's columns
+            self.columns.extend(
+                getattr(nested_entity, field).label(f"{name}__{field}") for field in nested_names
+            )
+
+    def to_dict(self, row: Sequence[Any]) -> Dict[str, Any]:
+        data = dict(zip(self.names, row))
+        for name, nested_names, start in self.nested:
+            data[name] = dict(zip(nested_names, row[start:start + len(nested_names)]))
+        return data
+
+    def dump(self, rows) -> bytes:
+        return orjson.dumps([self.to_dict(row) for row in rows])
+
+def json_response(body: bytes, response: Optional[Response] = None) -> Response:
+    """
+    Wrap pre-encoded JSON in a response, keeping the headers a handler set on its injected
+    `response` (FastAPI ignores those when a handler returns its own Response).
+    """
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
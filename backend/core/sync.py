@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import SessionLocal
+from models.task import TaskTombstone
+from models.workspace import Workspace
+
+logger = logging.getLogger(__name__)
+
+async def compact_tombstones(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """
+    Purge tombstones past the retention window and return how many were removed.
+    Each affected workspace's changes_floor is raised to the newest purged sequence, so
+    cursors from before it get a 410 instead of silently missing those deletions.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+
+    floors = (await db.execute(
+        select(TaskTombstone.workspace_id, func.max(TaskTombstone.change_seq))
+        .where(TaskTombstone.deleted_at < cutoff)
+        .group_by(TaskTombstone.workspace_id)
+    )).all()
+    if not floors:
+        return 0
+
+    await db.execute(
+        update(Workspace),
+        [{"id": workspace_id, "changes_floor": change_seq} for workspace_id, change_seq in floors]
+    )
+    result = await db.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff))
+    await db.commit()
+    return result.rowcount
+
+async def run_tombstone_compaction() -> None:
+    """
+    Compact tombstones every TOMBSTONE_COMPACTION_INTERVAL_SECONDS until cancelled.
+    """
+    while True:
+        await asyncio.sleep(settings.TOMBSTONE_COMPACTION_INTERVAL_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                purged = await compact_tombstones(db)
+            if purged:
+                logger.info("Compacted %d task tombstones", purged)
+        except Exception:
+            logger.exception("Tombstone compaction failed")
@@ -1,33 +1,338 @@
-from typing import Dict, List
-from fastapi import WebSocket
+import asyncio
+import logging
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, List, Optional, Set, Tuple
+import orjson
+from fastapi import WebSocket, status
+from core.config import settings
+from core.metrics import Counter, Gauge, Histogram
+from core.pubsub import EventBus, InMemoryEventBus
+from core.security import apply_invalidation, on_invalidation
+
+logger = logging.getLogger(__name__)
+
+ws_deliver_duration = Histogram(
+    "ws_deliver_duration_seconds", "Time to stamp, encode and queue one event for a workspace's local subscribers."
+)
+ws_send_duration = Histogram("ws_send_duration_seconds", "Time to write one frame to a WebSocket.")
+ws_frames_queued = Counter("ws_frames_queued_total", "Frames queued for WebSocket subscribers.")
+ws_evictions = Counter("ws_evictions_total", "WebSocket subscribers dropped for being too slow.", ("reason",))
+
+def encode_message(message: dict) -> str:
+    """
+    Serialize a broadcast message to the text of a WebSocket frame.
+    """
+    return orjson.dumps(message).decode("utf-8")
+
+class ClientConnection:
+    """
+    A subscribed WebSocket with its own bounded outbound queue of pre-encoded frames, drained by a
+    dedicated writer task so a slow client only ever delays itself.
+    """
+
+    def __init__(self, websocket: WebSocket, workspace_id: int):
+        self.websocket = websocket
+        self.workspace_id = workspace_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.writer: asyncio.Task = None
+
+    def enqueue(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+class PendingEvents:
+    """
+    A workspace's events waiting for its coalescing window to close. Successive events for
+    the same task collapse into one carrying the latest state, at the position of the first.
+    """
+
+    def __init__(self):
+        self.events: Dict[Hashable, dict] = {}
+        self._untracked = 0
+
+    def add(self, message: dict):
+        if message.get("type") == "BATCH":
+            for event in message["events"]:
+                self.add(event)
+            return
+
+        task_id = message.get("task_id") or (message.get("task") or {}).get("id")
+        if message.get("type") not in ("TASK_CREATED", "TASK_UPDATED", "TASK_DELETED") or task_id is None:
+            self._untracked += 1
+            self.events[("event", self._untracked)] = message
+            return
+
+        key = ("task", task_id)
+        previous = self.events.get(key)
+        if previous is None:
+            self.events[key] = message
+        elif previous["type"] == "TASK_CREATED" and message["type"] == "TASK_DELETED":
+            # Created and deleted within the window: clients never need to see it
+            del self.events[key]
+        elif previous["type"] == "TASK_CREATED":
+            self.events[key] = {**message, "type": "TASK_CREATED"}
+        else:
+            self.events[key] = message
+
+    def to_message(self):
+        """
+        The frame to send: the lone event itself, or a BATCH of all of them in order.
+        """
+        events = list(self.events.values())
+        if len(events) == 1:
+            return events[0]
+        return {"type": "BATCH", "events": events} if events else None
+
+class ReplayBuffer:
+    """
+    The last frames delivered for a workspace with their sequence numbers, at most
+    WS_REPLAY_BUFFER_SIZE of them and WS_REPLAY_BUFFER_BYTES in total.
+    `floor` is the newest seq no longer held: a client that has seen it can be caught up from here.
+    """
+
+    def __init__(self, floor: int):
+        self.floor = floor
+        self.frames: Deque[Tuple[int, str]] = deque()
+        self.size = 0
+        # When the workspace's last subscriber on this worker left (None while it has some)
+        self.idle_since: Optional[float] = None
+
+    def append(self, seq: int, frame: str):
+        if len(frame) > settings.WS_REPLAY_MAX_FRAME_BYTES:
+            # Not held, so nothing before it can be replayed either
+            self.frames.clear()
+            self.size = 0
+            self.floor = seq
+            return
+
+        self.frames.append((seq, frame))
+        self.size += len(frame)
+        while len(self.frames) > settings.WS_REPLAY_BUFFER_SIZE or self.size > settings.WS_REPLAY_BUFFER_BYTES:
+            self.floor, dropped = self.frames.popleft()
+            self.size -= len(dropped)
+
+    def since(self, last_seq: int) -> List[str]:
+        return [frame for seq, frame in self.frames if seq > last_seq]
+
+# Bus messages for this "workspace" are meant for the workers themselves, never for sockets
+WORKER_CHANNEL = 0
 
 class ConnectionManager:
     def __init__(self):
-        # Map workspace_id to list of active WebSockets
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        # Map workspace_id to the set of active connections
+        self.active_connections: Dict[int, Set[ClientConnection]] = {}
+        # Replaced by the configured backend at startup (see main.lifespan)
+        self.bus: EventBus = InMemoryEventBus()
+        # Per-workspace coalescing buffers and the tasks that flush them
+        self._pending: Dict[int, PendingEvents] = {}
+        self._flushers: Dict[int, asyncio.Task] = {}
+        # Every delivered frame is stamped with the next seq. Numbering starts in a random 2**32 block,
+        # so a last_seq issued by another worker or an earlier process falls outside this one's range
+        self._seq = secrets.randbits(20) << 32
+        # Replay buffers of workspaces subscribed on this worker, least recently used first
+        self._replay: "OrderedDict[int, ReplayBuffer]" = OrderedDict()
+
+    async def start(self, bus: EventBus):
+        await self.bus.stop()
+        self.bus = bus
+        await self.bus.start(self.deliver)
+
+    async def stop(self):
+        for workspace_id in list(self._pending):
+            self._flushers.pop(workspace_id).cancel()
+            await self._flush(workspace_id)
+        await self.bus.stop()
 
-    async def connect(self, websocket: WebSocket, workspace_id: int):
+    async def connect(self, websocket: WebSocket, workspace_id: int, last_seq: Optional[int] = None) -> ClientConnection:
+        """
+        Subscribe a socket to a workspace. With `last_seq`, the frames delivered after it are
+        replayed first, or a RESYNC frame is sent when they are no longer buffered.
+        """
         await websocket.accept()
-        if workspace_id not in self.active_connections:
-            self.active_connections[workspace_id] = []
-        self.active_connections[workspace_id].append(websocket)
+        connection = ClientConnection(websocket, workspace_id)
 
-    def disconnect(self, websocket: WebSocket, workspace_id: int):
-        if workspace_id in self.active_connections:
-            if websocket in self.active_connections[workspace_id]:
-                self.active_connections[workspace_id].remove(websocket)
-            if not self.active_connections[workspace_id]:
-                del self.active_connections[workspace_id]
+        # No awaits from here on: the replay and the subscription happen before any further delivery
+        if last_seq is not None:
+            missed = self._missed_frames(workspace_id, last_seq)
+            if missed is None or len(missed) > connection.queue.maxsize:
+                connection.enqueue(encode_message({"type": "RESYNC", "seq": self._seq}))
+            else:
+                for frame in missed:
+                    connection.enqueue(frame)
+        self._replay_buffer(workspace_id).idle_since = None
+
+        connection.writer = asyncio.create_task(self._write_loop(connection))
+        self.active_connections.setdefault(workspace_id, set()).add(connection)
+        return connection
+
+    def _missed_frames(self, workspace_id: int, last_seq: int) -> Optional[List[str]]:
+        buffer = self._replay.get(workspace_id)
+        if buffer is None or not buffer.floor <= last_seq <= self._seq:
+            return None
+        return buffer.since(last_seq)
+
+    def _replay_buffer(self, workspace_id: int) -> ReplayBuffer:
+        buffer = self._replay.get(workspace_id)
+        if buffer is None:
+            # Holds every frame from now on, so resuming from the current seq is safe
+            buffer = self._replay[workspace_id] = ReplayBuffer(floor=self._seq)
+            if len(self._replay) > settings.WS_REPLAY_MAX_WORKSPACES:
+                self._replay.popitem(last=False)
+        else:
+            self._replay.move_to_end(workspace_id)
+        return buffer
+
+    def disconnect(self, connection: ClientConnection):
+        connections = self.active_connections.get(connection.workspace_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.active_connections[connection.workspace_id]
+                self._expire_replay_later(connection.workspace_id)
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def _expire_replay_later(self, workspace_id: int):
+        buffer = self._replay.get(workspace_id)
+        if buffer is None:
+            return
+        buffer.idle_since = time.monotonic()
+        asyncio.get_running_loop().call_later(settings.WS_REPLAY_IDLE_SECONDS, self._expire_replay, workspace_id)
+
+    def _expire_replay(self, workspace_id: int):
+        # A subscriber may have come and gone since: only the timer of the latest departure drops it
+        buffer = self._replay.get(workspace_id)
+        if (
+            buffer is not None
+            and buffer.idle_since is not None
+            and time.monotonic() - buffer.idle_since >= settings.WS_REPLAY_IDLE_SECONDS
+        ):
+            del self._replay[workspace_id]
 
     async def broadcast(self, workspace_id: int, message: dict):
-        if workspace_id in self.active_connections:
-            for connection in self.active_connections[workspace_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    # Handle potential errors (e.g. connection closed)
-                    # For now, we might want to log it or remove the connection,
-                    # but disconnect() usually handles the cleanup on the receive side.
-                    pass
+        """
+        Send a message to the workspace's subscribers on this worker and, through the bus, on every other one.
+        With WS_COALESCE_MS set, the message is held back and merged with the workspace's other events
+        from the same window.
+        """
+        if settings.WS_COALESCE_MS <= 0:
+            await self._emit(workspace_id, message)
+            return
+
+        pending = self._pending.get(workspace_id)
+        if pending is None:
+            pending = self._pending[workspace_id] = PendingEvents()
+            self._flushers[workspace_id] = asyncio.create_task(
+                self._flush_later(workspace_id, settings.WS_COALESCE_MS / 1000)
+            )
+        pending.add(message)
+
+    async def _flush_later(self, workspace_id: int, delay: float):
+        await asyncio.sleep(delay)
+        self._flushers.pop(workspace_id, None)
+        await self._flush(workspace_id)
+
+    async def _flush(self, workspace_id: int):
+        pending = self._pending.pop(workspace_id, None)
+        message = pending.to_message() if pending is not None else None
+        if message is not None:
+            await self._emit(workspace_id, message)
+
+    async def _emit(self, workspace_id: int, message: dict):
+        await self.deliver(workspace_id, message)
+        await self.bus.publish(workspace_id, message)
+
+    def publish_invalidation(self, message: dict):
+        """
+        Have the other workers drop the cache entries this one just invalidated (see core.security).
+        May run from a commit hook, so the message is sent in the background.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside the server (a script): workers fall back on the caches' TTLs
+            return
+        loop.create_task(self.bus.publish(WORKER_CHANNEL, message))
+
+    async def deliver(self, workspace_id: int, message: dict):
+        """
+        Queue a message for every local subscriber of the workspace without waiting on any socket.
+        The message is stamped with the next seq and encoded once; the same frame object is shared by
+        all recipients and the workspace's replay buffer.
+        """
+        if workspace_id == WORKER_CHANNEL:
+            apply_invalidation(message)
+            return
+
+        connections = self.active_connections.get(workspace_id)
+        if not connections and workspace_id not in self._replay:
+            return
+
+        start = time.perf_counter()
+        self._seq += 1
+        frame = encode_message({**message, "seq": self._seq})
+        self._replay_buffer(workspace_id).append(self._seq, frame)
+        if not connections:
+            ws_deliver_duration.observe(time.perf_counter() - start)
+            return
+
+        overflowed = None
+        for connection in connections:
+            if not connection.enqueue(frame):
+                if overflowed is None:
+                    overflowed = []
+                overflowed.append(connection)
+        ws_frames_queued.inc(amount=len(connections) - len(overflowed or ()))
+
+        # Evict after iterating, since eviction mutates the set
+        if overflowed:
+            logger.warning("Evicting %d WebSocket(s) in workspace %s: send queue full", len(overflowed), workspace_id)
+            ws_evictions.inc("queue_full", amount=len(overflowed))
+            for connection in overflowed:
+                self._evict(connection)
+        ws_deliver_duration.observe(time.perf_counter() - start)
+
+    async def _write_loop(self, connection: ClientConnection):
+        try:
+            while True:
+                frame = await connection.queue.get()
+                start = time.perf_counter()
+                await asyncio.wait_for(
+                    connection.websocket.send_text(frame),
+                    timeout=settings.WS_SEND_TIMEOUT_SECONDS
+                )
+                ws_send_duration.observe(time.perf_counter() - start)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Timed out or the socket is gone
+            logger.info("Evicting WebSocket in workspace %s: send failed", connection.workspace_id)
+            ws_evictions.inc("send_failed")
+            self._evict(connection)
+
+    def _evict(self, connection: ClientConnection):
+        self.disconnect(connection)
+        # Closing may itself block on a stalled client, so never await it inline
+        asyncio.create_task(self._close(connection.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=status.WS_1013_TRY_AGAIN_LATER),
+                timeout=settings.WS_SEND_TIMEOUT_SECONDS
+            )
+        except Exception:
+            pass
 
 manager = ConnectionManager()
+on_invalidation.append(manager.publish_invalidation)
+
+Gauge(
+    "ws_connections", "WebSocket subscribers on this worker, by workspace.", ("workspace_id",),
+    collect=lambda: {(str(workspace_id),): len(connections) for workspace_id, connections in manager.active_connections.items()}
+)
@@ -1,9 +1,27 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from api.v1 import auth, workspaces, tasks, websockets
+from core.database import LAST_WRITE_HEADER, ReadYourWritesMiddleware
+from core.metrics import MetricsMiddleware, render_metrics
+from core.pubsub import create_event_bus
+from core.security import membership_cache, principal_cache, shutdown_password_hasher
+from core.sync import run_tombstone_compaction
+from core.websocket import manager
 import os
 
-app = FastAPI(title="Nexus Tasks API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start(create_event_bus())
+    compactor = asyncio.create_task(run_tombstone_compaction())
+    yield
+    compactor.cancel()
+    await manager.stop()
+    shutdown_password_hasher()
+
+app = FastAPI(title="Nexus Tasks API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS Configuration
 origins = [
@@ -17,7 +35,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", LAST_WRITE_HEADER],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+# Outermost, so latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(workspaces.router, prefix="/api/v1/workspaces", tags=["Workspaces"])
@@ -27,3 +49,27 @@ app.include_router(websockets.router, tags=["WebSockets"]) # No prefix or /api/v
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "service": "backend"}
+
+@app.get("/health/caches")
+async def cache_stats():
+    """
+    Hit/miss counters of the in-process caches, for sizing them.
+    """
+    return {
+        "principals": principal_cache.stats(),
+        "memberships": membership_cache.stats(),
+    }
+
+@app.get("/health/events")
+async def event_bus_stats():
+    """
+    Cross-worker event bus counters and delivery latency.
+    """
+    return manager.bus.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Request, query, pool and WebSocket metrics of this worker in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
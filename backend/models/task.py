@@ -1,6 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SqEnum, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SqEnum, DateTime, Text, Index, DDL, event
+from sqlalchemy.orm import backref, relationship
 from core.database import Base
 from datetime import datetime
 
@@ -33,7 +33,83 @@ class Task(Base):
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Workspace version of the write that last touched this row (see GET .../tasks/changes)
+    change_seq = Column(Integer, default=0, server_default="0", nullable=False)
 
-    # Relationships
-    workspace = relationship("Workspace", backref="tasks")
-    assignee = relationship("User", foreign_keys=[assignee_id])
+    # Relationships. Lazy loads raise instead of emitting a query per row: load them eagerly
+    # (selectinload/joinedload/contains_eager) or select the columns (see core/serialization.py)
+    workspace = relationship("Workspace", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
+    assignee = relationship("User", foreign_keys=[assignee_id], lazy="raise_on_sql")
+
+    # Composite indexes matching the board filters; the trailing id keeps keyset pagination index-only
+    __table_args__ = (
+        Index("ix_tasks_workspace_id_id", "workspace_id", "id"),
+        Index("ix_tasks_workspace_id_status_id", "workspace_id", "status", "id"),
+        Index("ix_tasks_workspace_id_assignee_id_id", "workspace_id", "assignee_id", "id"),
+        # Serves the "my tasks" feed in its sort order (see get_my_tasks)
+        Index("ix_tasks_assignee_id_priority_due_date_id", "assignee_id", "priority", "due_date", "id"),
+        # Serves the delta sync feed
+        Index("ix_tasks_workspace_id_change_seq", "workspace_id", "change_seq"),
+    )
+
+# Full-text search index over title and description, maintained by the database on every write.
+# It lives outside the ORM mapping because each backend needs its own construct (see core/search.py).
+# Migrations keep their own copy of these statements; a change here needs a new revision.
+TASK_SEARCH_DDL = {
+    "postgresql": [
+        # Title matches weigh more than description matches in ts_rank
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ],
+}
+
+for dialect, statements in TASK_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+# The triggers go with the table, the external-content FTS table does not
+event.listen(Task.__table__, "after_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
+
+class TaskTombstone(Base):
+    """
+    Record of a deleted task, so the changes feed can report deletions.
+    Compacted after TASK_TOMBSTONE_RETENTION_DAYS (see core/sync.py).
+    """
+    __tablename__ = "task_tombstones"
+
+    task_id = Column(Integer, primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_tombstones_workspace_id_change_seq", "workspace_id", "change_seq"),
+        Index("ix_task_tombstones_deleted_at", "deleted_at"),
+    )
+
+class TaskCounter(Base):
+    """
+    Number of tasks per workspace along one dimension ("status", "priority", "assignee" or "due"),
+    kept up to date by every task write (see core/counters.py).
+    """
+    __tablename__ = "task_counters"
+
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    dimension = Column(String, primary_key=True)
+    # Status or priority value, assignee id ("" for unassigned) or ISO due day of open tasks
+    key = Column(String, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
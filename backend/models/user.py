@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DDL, event
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -10,4 +10,10 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
 
-    workspaces = relationship("WorkspaceMember", back_populates="user")
+    # Lazy loads raise, see models/task.py
+    workspaces = relationship("WorkspaceMember", back_populates="user", lazy="raise_on_sql")
+
+# The member directory filters and sorts on lower(email). Under the "C" collation one btree serves both
+# the prefix LIKE and the ORDER BY (see list_workspace_members); SQLite scans the workspace's members instead
+USER_EMAIL_DIRECTORY_DDL = 'CREATE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email) COLLATE "C")'
+event.listen(User.__table__, "after_create", DDL(USER_EMAIL_DIRECTORY_DDL).execute_if(dialect="postgresql"))
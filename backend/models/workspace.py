@@ -19,9 +19,9 @@ class WorkspaceMember(Base):
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     role = Column(SqEnum(WorkspaceRole), default=WorkspaceRole.MEMBER, nullable=False)
 
-    # Relationships
-    workspace = relationship("Workspace", back_populates="members")
-    user = relationship("User", back_populates="workspaces")
+    # Relationships (lazy loads raise, see models/task.py)
+    workspace = relationship("Workspace", back_populates="members", lazy="raise_on_sql")
+    user = relationship("User", back_populates="workspaces", lazy="raise_on_sql")
 
 class Workspace(Base):
     __tablename__ = "workspaces"
@@ -30,7 +30,13 @@ class Workspace(Base):
     name = Column(String, nullable=False)
     type = Column(SqEnum(WorkspaceType), default=WorkspaceType.PERSONAL, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-
-    # Relationships
-    members = relationship("WorkspaceMember", back_populates="workspace", cascade="all, delete-orphan")
-    owner = relationship("User", foreign_keys=[owner_id])
+    # Bumped in the same transaction as every task or membership write (see bump_workspace_version)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    # Oldest `since` the changes feed can still answer; raised when tombstones are compacted
+    changes_floor = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Relationships (lazy loads raise, see models/task.py)
+    members = relationship(
+        "WorkspaceMember", back_populates="workspace", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    owner = relationship("User", foreign_keys=[owner_id], lazy="raise_on_sql")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 from models.task import TaskStatus, TaskPriority
 
@@ -41,3 +41,38 @@ class WorkspaceInfo(BaseModel):
 class TaskWithWorkspace(TaskResponse):
     workspace: WorkspaceInfo
 
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+# Upper bound on create + update + delete items in one batch request
+TASK_BATCH_MAX_ITEMS = 10000
+
+class TaskBatchRequest(BaseModel):
+    create: List[TaskCreate] = Field(default_factory=list, max_length=TASK_BATCH_MAX_ITEMS)
+    update: List[TaskBatchUpdate] = Field(default_factory=list, max_length=TASK_BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=TASK_BATCH_MAX_ITEMS)
+
+class TaskBatchResult(BaseModel):
+    op: str # "create", "update" or "delete"
+    index: int # Position of the item in its request list
+    status: int # HTTP-style status of this item
+    id: Optional[int] = None
+    task: Optional[TaskResponse] = None
+    error: Optional[str] = None
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
+
+
+class TaskChanges(BaseModel):
+    tasks: List[TaskResponse] # Created or updated since the cursor
+    deleted: List[int] # Ids of tasks deleted since the cursor
+    cursor: str # Pass as `since` on the next call
+
+class TaskSummary(BaseModel):
+    total: int
+    by_status: Dict[TaskStatus, int]
+    by_priority: Dict[TaskPriority, int]
+    by_assignee: Dict[int, int] # Keyed by user id
+    unassigned: int
+    overdue: int # Open tasks whose due day (UTC) has passed
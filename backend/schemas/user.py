@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -19,3 +20,16 @@ class UserResponse(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+# Upper bound on users in one provisioning request
+USER_PROVISION_MAX_ITEMS = 10000
+
+class UserProvision(UserBase):
+    password: Optional[str] = None # Without one, the account can only sign in through SSO
+
+class UserProvisionRequest(BaseModel):
+    users: List[UserProvision] = Field(max_length=USER_PROVISION_MAX_ITEMS)
+
+class UserProvisionResponse(BaseModel):
+    created: List[UserResponse]
+    existing: List[str] # Emails that were already registered and were left unchanged
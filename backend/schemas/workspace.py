@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from models.workspace import WorkspaceType, WorkspaceRole
 
 class WorkspaceBase(BaseModel):
@@ -19,6 +19,21 @@ class WorkspaceResponse(WorkspaceBase):
 class WorkspaceMemberInvite(BaseModel):
     email: EmailStr
 
+# Upper bound on emails in one bulk invite
+MEMBER_INVITE_MAX_ITEMS = 10000
+
+class WorkspaceMemberBulkInvite(BaseModel):
+    emails: List[EmailStr] = Field(max_length=MEMBER_INVITE_MAX_ITEMS)
+
+class WorkspaceMemberInviteResult(BaseModel):
+    email: str
+    status: int # HTTP-style status of this email: 200 added, 404 no such user, 400 already a member
+    user_id: Optional[int] = None
+    error: Optional[str] = None
+
+class WorkspaceMemberBulkInviteResponse(BaseModel):
+    results: List[WorkspaceMemberInviteResult] # In request order, one per distinct email
+
 class UserInfo(BaseModel):
     id: int
     email: str
@@ -1,31 +1,48 @@
 import sys
 import os
+import asyncio
+from contextlib import contextmanager
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 # Ensure 'backend' is in the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Cheapest bcrypt cost factor keeps the suite fast; must be set before settings are imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 from main import app
 from core.database import Base, get_db
+from core.metrics import count_queries, instrument_engine
+from core.security import membership_cache, principal_cache
 # Import all models to ensure they are registered with Base.metadata
 from models.user import User
 from models.workspace import Workspace, WorkspaceMember
 from models.task import Task
 
 # Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-engine = create_engine(
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument_engine(engine)
+
+TestingSessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async def drop_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -33,22 +50,22 @@ def db_session():
     Creates a fresh database session for a test function.
     """
     # Create the database tables
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(create_tables())
     
     session = TestingSessionLocal()
     try:
         yield session
     finally:
-        session.close()
+        asyncio.run(session.close())
         # Drop the tables after the test
-        Base.metadata.drop_all(bind=engine)
+        asyncio.run(drop_tables())
 
 @pytest.fixture(scope="function")
 def client(db_session):
     """
     Returns a TestClient that uses the test database session.
     """
-    def override_get_db():
+    async def override_get_db():
         try:
             yield db_session
         finally:
@@ -58,3 +75,22 @@ def client(db_session):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+    # In-process caches outlive the per-test database
+    principal_cache.clear()
+    membership_cache.clear()
+
+@pytest.fixture
+def query_budget():
+    """
+    `with query_budget(n): ...` fails the test if the block runs more than n statements.
+    Yields the QueryLog, so a test can also compare counts across result sizes.
+    """
+    @contextmanager
+    def budget(limit: int):
+        with count_queries(engine) as log:
+            yield log
+        assert log.count <= limit, (
+            f"{log.count} queries, budget is {limit}:\n" + "\n".join(log.statements)
+        )
+
+    return budget
@@ -0,0 +1,14 @@
+def get_auth_headers(client, email="tasks@example.com"):
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "password123"}
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": email, "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_workspace_id(client, headers):
+    response = client.get("/api/v1/workspaces/", headers=headers)
+    return response.json()[0]["id"]
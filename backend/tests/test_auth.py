@@ -1,3 +1,9 @@
+from core.config import settings
+from api.v1 import auth
+from core import security
+from core.security import principal_cache
+from tests.helpers import get_auth_headers
+
 def test_register_user(client):
     response = client.post(
         "/api/v1/auth/register",
@@ -47,3 +53,107 @@ def test_login_invalid_credentials(client):
         data={"username": "wrong@example.com", "password": "wrongpassword"}
     )
     assert response.status_code == 401
+
+def test_token_resolution_is_cached(client):
+    headers = get_auth_headers(client, "cached@example.com")
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    hits = principal_cache.hits
+
+    response = client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "cached@example.com"
+    assert principal_cache.hits == hits + 1
+
+def test_deactivated_user_is_rejected(client):
+    headers = get_auth_headers(client, "leaving@example.com")
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    response = client.post("/api/v1/auth/me/deactivate", headers=headers)
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "leaving@example.com", "password": "password123"}
+    )
+    assert response.status_code == 401
+
+def test_register_sheds_load_when_hasher_saturated(client, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "busy@example.com", "password": "password123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_hasher_pool_recovers_from_a_dead_worker(client):
+    response = client.post("/api/v1/auth/register", json={"email": "first@example.com", "password": "password123"})
+    assert response.status_code == 200
+    for process in list(security._get_hasher_pool()._processes.values()):
+        process.kill()
+
+    response = client.post("/api/v1/auth/register", json={"email": "second@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+def test_no_connection_held_while_hashing(client, db_session, monkeypatch):
+    in_transaction = []
+
+    def holding(hasher):
+        async def check(*args):
+            in_transaction.append(db_session.in_transaction())
+            return await hasher(*args)
+        return check
+
+    monkeypatch.setattr(auth, "get_password_hash_async", holding(auth.get_password_hash_async))
+    monkeypatch.setattr(auth, "verify_password_async", holding(auth.verify_password_async))
+    response = client.post("/api/v1/auth/register", json={"email": "pool@example.com", "password": "password123"})
+    assert response.status_code == 200
+    response = client.post("/api/v1/auth/login", data={"username": "pool@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+    assert in_transaction == [False, False]
+
+def test_register_is_one_transaction(client, query_budget):
+    # Email check and three INSERTs, committed together
+    with query_budget(4) as log:
+        response = client.post(
+            "/api/v1/auth/register",
+            json={"email": "atomic@example.com", "password": "password123"}
+        )
+    assert response.status_code == 200
+    assert [statement.split()[0] for statement in log.statements] == ["SELECT", "INSERT", "INSERT", "INSERT"]
+
+    headers = get_auth_headers(client, "atomic@example.com")
+    workspaces = client.get("/api/v1/workspaces/", headers=headers).json()
+    assert [(w["name"], w["type"], w["owner_id"]) for w in workspaces] == [("Personal", "PERSONAL", response.json()["id"])]
+
+def test_provision_users_in_bulk(client, monkeypatch):
+    get_auth_headers(client, "already@example.com")
+    users = [{"email": f"sso{index}@example.com"} for index in range(50)]
+    users += [{"email": "withpassword@example.com", "password": "password123"}, {"email": "already@example.com"}]
+    users.append({"email": "sso0@example.com"})
+
+    response = client.post("/api/v1/auth/provision", json={"users": users})
+    assert response.status_code == 403  # Disabled without a configured token
+
+    monkeypatch.setattr(settings, "PROVISIONING_TOKEN", "scim-secret")
+    response = client.post("/api/v1/auth/provision", json={"users": users}, headers={"X-Provisioning-Token": "wrong"})
+    assert response.status_code == 403
+
+    response = client.post("/api/v1/auth/provision", json={"users": users}, headers={"X-Provisioning-Token": "scim-secret"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["existing"] == ["already@example.com"]
+    assert [user["email"] for user in data["created"]] == [user["email"] for user in users[:51]]
+
+    # Provisioned users get a personal workspace; only those given a password can log in with one
+    headers = get_auth_headers(client, "withpassword@example.com")
+    workspaces = client.get("/api/v1/workspaces/", headers=headers).json()
+    assert [w["type"] for w in workspaces] == ["PERSONAL"]
+    response = client.post("/api/v1/auth/login", data={"username": "sso1@example.com", "password": "!"})
+    assert response.status_code == 401
+
+    response = client.post("/api/v1/auth/provision", json={"users": users}, headers={"X-Provisioning-Token": "scim-secret"})
+    assert response.json()["created"] == []
+    assert len(response.json()["existing"]) == 52
@@ -0,0 +1,363 @@
+import asyncio
+import json
+
+from core.config import settings
+from core.pubsub import InMemoryEventBus, InMemoryHub, PostgresEventBus
+from core import security
+from core.security import Membership, Principal, membership_cache, principal_cache
+from core.websocket import ConnectionManager
+from models.workspace import WorkspaceRole
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.seqs = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        message = json.loads(frame)
+        # Sequence numbers are checked separately (see test_resume_replays_missed_frames)
+        self.seqs.append(message.pop("seq", None))
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+def test_broadcast_does_not_wait_for_slow_clients(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        manager = ConnectionManager()
+        fast = FakeWebSocket()
+        slow = FakeWebSocket(delay=1)
+        await manager.connect(fast, 1)
+        await manager.connect(slow, 1)
+
+        await asyncio.wait_for(manager.broadcast(1, {"type": "PING"}), timeout=0.01)
+        await asyncio.sleep(0.1)
+
+        assert fast.sent == [{"type": "PING"}]
+        # The stalled client timed out and was evicted
+        assert slow.sent == []
+        assert slow.close_code == 1013
+        assert {c.websocket for c in manager.active_connections[1]} == {fast}
+
+    asyncio.run(scenario())
+
+def test_overflowing_client_is_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 2)
+
+    async def scenario():
+        manager = ConnectionManager()
+        stalled = FakeWebSocket(delay=10)
+        connection = await manager.connect(stalled, 1)
+
+        for i in range(4):
+            await manager.broadcast(1, {"n": i})
+        await asyncio.sleep(0.01)
+
+        assert 1 not in manager.active_connections
+        assert stalled.close_code == 1013
+        assert connection.writer.done()
+
+    asyncio.run(scenario())
+
+def test_disconnect_removes_connection():
+    async def scenario():
+        manager = ConnectionManager()
+        connection = await manager.connect(FakeWebSocket(), 7)
+        manager.disconnect(connection)
+        manager.disconnect(connection)
+        assert manager.active_connections == {}
+
+    asyncio.run(scenario())
+
+def test_broadcast_encodes_once_for_all_recipients():
+    async def scenario():
+        manager = ConnectionManager()
+        connections = [await manager.connect(FakeWebSocket(delay=10), 3) for _ in range(3)]
+
+        await manager.broadcast(3, {"type": "TASK_DELETED", "task_id": 1})
+
+        frames = [connection.queue.get_nowait() for connection in connections]
+        assert json.loads(frames[0]) == {"type": "TASK_DELETED", "task_id": 1, "seq": manager._seq}
+        assert all(frame is frames[0] for frame in frames)
+        for connection in connections:
+            manager.disconnect(connection)
+
+    asyncio.run(scenario())
+
+def test_broadcast_reaches_other_workers_through_bus():
+    async def scenario():
+        hub = InMemoryHub()
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        await worker_a.start(InMemoryEventBus(hub))
+        await worker_b.start(InMemoryEventBus(hub))
+        socket_a, socket_b = FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(socket_a, 5)
+        await worker_b.connect(socket_b, 5)
+
+        await worker_a.broadcast(5, {"type": "TASK_DELETED", "task_id": 9})
+        await asyncio.sleep(0.01)
+
+        # Exactly once per socket, including the publishing worker's own
+        assert socket_a.sent == [{"type": "TASK_DELETED", "task_id": 9}]
+        assert socket_b.sent == [{"type": "TASK_DELETED", "task_id": 9}]
+        assert worker_b.bus.stats()["received"] == 1
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+
+def test_deactivation_reaches_other_workers_through_bus():
+    async def scenario():
+        hub = InMemoryHub()
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        await worker_a.start(InMemoryEventBus(hub))
+        await worker_b.start(InMemoryEventBus(hub))
+        socket_b = FakeWebSocket()
+        await worker_b.connect(socket_b, 5)
+        # Both "workers" share one process cache here, so only worker_b can have emptied it
+        principal_cache.set("token", Principal(id=7, email="gone@example.com", is_active=True))
+
+        worker_a.publish_invalidation({"type": "USERS_DEACTIVATED", "user_ids": [7]})
+        await asyncio.sleep(0.01)
+
+        assert principal_cache.get("token") is None
+        assert socket_b.sent == []
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+
+def test_membership_changes_reach_other_workers_through_bus(monkeypatch):
+    applied = []
+    apply_locally = security.apply_invalidation
+
+    def apply_invalidation(message):
+        applied.append(message)
+        apply_locally(message)
+
+    async def scenario():
+        hub = InMemoryHub()
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        await worker_a.start(InMemoryEventBus(hub))
+        await worker_b.start(InMemoryEventBus(hub))
+        monkeypatch.setattr(security, "on_invalidation", [worker_a.publish_invalidation])
+        monkeypatch.setattr("core.websocket.apply_invalidation", apply_invalidation)
+        # Both "workers" share one process cache here: leave worker_a's own invalidation out
+        monkeypatch.setattr(security, "apply_invalidation", lambda message: None)
+        # A removed member's role and an invitee's "not a member" must not outlive the change anywhere
+        membership_cache.set((7, 5), Membership(workspace_id=5, user_id=7, role=WorkspaceRole.MEMBER))
+        membership_cache.set((8, 5), None)
+
+        security.invalidate_memberships(5, 7, 8)
+        await asyncio.sleep(0.01)
+
+        assert applied == [{"type": "MEMBERSHIPS_CHANGED", "workspace_id": 5, "user_ids": [7, 8]}]
+        assert membership_cache.get((7, 5), "missing") == "missing"
+        assert membership_cache.get((8, 5), "missing") == "missing"
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+
+def test_postgres_bus_chunks_large_payloads():
+    class RecordingConnection:
+        closed = False
+
+        def __init__(self):
+            self.payloads = []
+
+        async def execute(self, query, params):
+            self.payloads.append(params[1])
+
+    async def scenario():
+        bus = PostgresEventBus("postgresql+psycopg://user:pw@localhost/db", "events")
+        bus._notify_conn = RecordingConnection()
+        message = {"type": "TASK_UPDATED", "task": {"id": 1, "description": "ü\"x" * 5000}}
+
+        await bus.publish(1, message)
+
+        payloads = bus._notify_conn.payloads
+        assert len(payloads) > 1
+        assert all(len(payload.encode("utf-8")) < 8000 for payload in payloads)
+        envelopes = [bus._reassemble(json.loads(payload)) for payload in reversed(payloads)]
+        assert envelopes[:-1] == [None] * (len(payloads) - 1)
+        assert envelopes[-1]["m"] == message
+
+    asyncio.run(scenario())
+
+def test_postgres_bus_closes_broken_listener_before_reconnecting(monkeypatch):
+    class DroppingConnection:
+        def __init__(self):
+            self.closed = False
+
+        async def execute(self, query):
+            pass
+
+        async def notifies(self):
+            raise ConnectionError("server closed the connection")
+            yield
+
+        async def close(self):
+            self.closed = True
+
+    connections = []
+
+    async def connect(conninfo, autocommit):
+        connections.append(DroppingConnection())
+        return connections[-1]
+
+    async def scenario():
+        monkeypatch.setattr("core.pubsub.psycopg.AsyncConnection.connect", connect)
+        monkeypatch.setattr(PostgresEventBus, "RECONNECT_DELAY_SECONDS", 0.01)
+        bus = PostgresEventBus("postgresql+psycopg://user:pw@localhost/db", "events")
+        listener = asyncio.create_task(bus._listen())
+        await asyncio.sleep(0.05)
+        listener.cancel()
+
+        assert len(connections) > 1
+        assert all(connection.closed for connection in connections[:-1])
+
+    asyncio.run(scenario())
+
+def test_coalescing_window_sends_one_batch(monkeypatch):
+    monkeypatch.setattr(settings, "WS_COALESCE_MS", 20)
+
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1)
+
+        await manager.broadcast(1, {"type": "TASK_UPDATED", "task": {"id": 1, "title": "a"}})
+        await manager.broadcast(1, {"type": "TASK_CREATED", "task": {"id": 2, "title": "new"}})
+        await manager.broadcast(1, {"type": "TASK_UPDATED", "task": {"id": 1, "title": "b"}})
+        await manager.broadcast(1, {"type": "TASK_UPDATED", "task": {"id": 2, "title": "newer"}})
+        await manager.broadcast(1, {"type": "TASK_CREATED", "task": {"id": 3, "title": "gone"}})
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 3})
+        assert websocket.sent == []
+
+        await asyncio.sleep(0.05)
+        assert websocket.sent == [{
+            "type": "BATCH",
+            "events": [
+                {"type": "TASK_UPDATED", "task": {"id": 1, "title": "b"}},
+                {"type": "TASK_CREATED", "task": {"id": 2, "title": "newer"}},
+            ],
+        }]
+
+        # A lone event in a window is sent as-is
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 1})
+        await asyncio.sleep(0.05)
+        assert websocket.sent[-1] == {"type": "TASK_DELETED", "task_id": 1}
+
+    asyncio.run(scenario())
+
+def test_resume_replays_missed_frames():
+    async def scenario():
+        manager = ConnectionManager()
+        first = FakeWebSocket()
+        connection = await manager.connect(first, 1)
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 1})
+        await asyncio.sleep(0.01)
+        manager.disconnect(connection)
+
+        # Delivered while the client was away
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 2})
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 3})
+        await manager.broadcast(2, {"type": "TASK_DELETED", "task_id": 4})
+
+        resumed = FakeWebSocket()
+        await manager.connect(resumed, 1, last_seq=first.seqs[-1])
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 5})
+        await asyncio.sleep(0.01)
+
+        assert [message["task_id"] for message in resumed.sent] == [2, 3, 5]
+        assert resumed.seqs == sorted(resumed.seqs)
+        assert resumed.seqs[0] == first.seqs[-1] + 1
+
+    asyncio.run(scenario())
+
+def test_resume_past_buffer_requests_resync(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_BUFFER_SIZE", 2)
+
+    async def scenario():
+        manager = ConnectionManager()
+        first = FakeWebSocket()
+        connection = await manager.connect(first, 1)
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 1})
+        await asyncio.sleep(0.01)
+        manager.disconnect(connection)
+        for task_id in range(2, 5):
+            await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": task_id})
+
+        rolled_over = FakeWebSocket()
+        await manager.connect(rolled_over, 1, last_seq=first.seqs[-1])
+        # A seq from another worker or process is never in range either
+        foreign = FakeWebSocket()
+        await manager.connect(foreign, 1, last_seq=1)
+        await asyncio.sleep(0.01)
+
+        assert rolled_over.sent == [{"type": "RESYNC"}]
+        assert foreign.sent == [{"type": "RESYNC"}]
+        # Resuming from the RESYNC seq picks up where the reload left off
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 5})
+        again = FakeWebSocket()
+        await manager.connect(again, 1, last_seq=rolled_over.seqs[0])
+        await asyncio.sleep(0.01)
+        assert again.sent == [{"type": "TASK_DELETED", "task_id": 5}]
+
+    asyncio.run(scenario())
+
+def test_oversized_frames_are_not_buffered(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_MAX_FRAME_BYTES", 200)
+
+    async def scenario():
+        manager = ConnectionManager()
+        first = FakeWebSocket()
+        connection = await manager.connect(first, 1)
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 1})
+        await asyncio.sleep(0.01)
+        manager.disconnect(connection)
+        await manager.broadcast(1, {"type": "TASK_UPDATED", "title": "x" * 500})
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 2})
+
+        # The big frame is gone, so only a client that saw it can resume
+        missed_it = FakeWebSocket()
+        await manager.connect(missed_it, 1, last_seq=first.seqs[-1])
+        saw_it = FakeWebSocket()
+        await manager.connect(saw_it, 1, last_seq=first.seqs[-1] + 1)
+        await asyncio.sleep(0.01)
+
+        assert missed_it.sent == [{"type": "RESYNC"}]
+        assert saw_it.sent == [{"type": "TASK_DELETED", "task_id": 2}]
+
+    asyncio.run(scenario())
+
+def test_replay_buffer_dropped_after_workspace_goes_idle(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_IDLE_SECONDS", 0.05)
+
+    async def scenario():
+        manager = ConnectionManager()
+        first = await manager.connect(FakeWebSocket(), 1)
+        manager.disconnect(first)
+        # Coming back within the window keeps the buffer
+        await asyncio.sleep(0.03)
+        second = await manager.connect(FakeWebSocket(), 1)
+        await asyncio.sleep(0.03)
+        assert 1 in manager._replay
+
+        manager.disconnect(second)
+        await asyncio.sleep(0.07)
+        assert 1 not in manager._replay
+        # Nobody is listening, so nothing is stored for the workspace any more
+        await manager.broadcast(1, {"type": "TASK_DELETED", "task_id": 1})
+        assert 1 not in manager._replay
+
+    asyncio.run(scenario())
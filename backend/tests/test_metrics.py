@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from core.metrics import db_queries_per_request, db_query_duration, http_request_duration, instrument_engine
+from tests.helpers import get_auth_headers, get_workspace_id
+
+def test_metrics_endpoint_reports_routes_and_queries(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    route = "/api/v1/workspaces/{workspace_id}/tasks"
+    series = ("GET", route, "200")
+    before = http_request_duration.values.get(series, [[0], 0.0])[0]
+
+    assert client.get(f"/api/v1/workspaces/{workspace_id}/tasks", headers=headers).status_code == 200
+    assert sum(http_request_duration.values[series][0]) == sum(before) + 1
+    # Labelled by route template, never by the raw path
+    assert not any(f"/workspaces/{workspace_id}/" in labels[1] for labels in http_request_duration.values)
+    counts, _ = db_queries_per_request.values[(route,)]
+    assert counts[0] == 0  # No request of this route ran zero queries
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert f'http_request_duration_seconds_bucket{{method="GET",route="{route}",status="200",le="+Inf"}}' in body
+    assert f'db_query_duration_seconds_count{{route="{route}"}}' in body
+    assert f'db_queries_per_request_count{{route="{route}"}}' in body
+    assert "# TYPE ws_connections gauge" in body
+    assert 'db_pool_connections{database="primary",state="size"}' in body
+
+def test_failed_statements_leave_nothing_on_the_connection():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as connection:
+        info = dict(connection.info)
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("SELECT * FROM missing_table")
+        before = sum(db_query_duration.values.get(("background",), [[0], 0.0])[0])
+        connection.exec_driver_sql("SELECT 1")
+
+        assert connection.info == info
+        assert sum(db_query_duration.values[("background",)][0]) == before + 1
@@ -0,0 +1,87 @@
+import pytest
+
+from tests.helpers import get_auth_headers, get_workspace_id
+
+# Statements per warm request (principal and membership cached), whatever the result size
+LIST_BUDGETS = {
+    "/api/v1/workspaces/": 2,  # ETag versions, workspaces
+    "/api/v1/workspaces/{workspace_id}/members": 2,  # ETag version, members joined to users
+    "/api/v1/workspaces/{workspace_id}/tasks": 2,  # ETag version, tasks
+    "/api/v1/workspaces/{workspace_id}/tasks?limit=100": 2,
+    "/api/v1/workspaces/{workspace_id}/tasks/changes": 2,  # floor and version, tasks
+    "/api/v1/workspaces/{workspace_id}/tasks/summary": 2,  # ETag version, counters
+    "/api/v1/tasks/me": 1,  # tasks joined to workspaces
+    "/api/v1/tasks/me?limit=100": 1,
+    "/api/v1/tasks/search?q=budget": 1,
+}
+
+def grow(client, headers, workspace_id, user_id, count):
+    """
+    Add `count` tasks assigned to the user, members and team workspaces.
+    """
+    client.post(
+        f"/api/v1/workspaces/{workspace_id}/tasks:batch",
+        json={"create": [{"title": f"Budget task {index}", "assignee_id": user_id} for index in range(count)]},
+        headers=headers
+    )
+    for index in range(count):
+        email = f"member{workspace_id}-{index}-{count}@example.com"
+        get_auth_headers(client, email)
+        client.post(f"/api/v1/workspaces/{workspace_id}/members", json={"email": email}, headers=headers)
+        client.post("/api/v1/workspaces/", json={"name": f"Team {index}"}, headers=headers)
+
+def measure(client, query_budget, headers, workspace_id):
+    counts = {}
+    for path, budget in LIST_BUDGETS.items():
+        url = path.format(workspace_id=workspace_id)
+        client.get(url, headers=headers)  # Warm the caches
+        with query_budget(budget) as log:
+            assert client.get(url, headers=headers).status_code == 200
+        counts[path] = log.count
+    return counts
+
+def test_list_endpoints_run_constant_queries(client, query_budget):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+
+    grow(client, headers, workspace_id, user_id, 1)
+    small = measure(client, query_budget, headers, workspace_id)
+    grow(client, headers, workspace_id, user_id, 20)
+    assert measure(client, query_budget, headers, workspace_id) == small
+
+def test_query_budget_reports_statements(client, query_budget):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+
+    with pytest.raises(AssertionError) as excinfo:
+        with query_budget(0):
+            client.get(f"/api/v1/workspaces/{workspace_id}/tasks", headers=headers)
+    assert "budget is 0" in str(excinfo.value)
+    assert "SELECT" in str(excinfo.value)
+
+def test_task_writes_check_access_in_the_write(client, query_budget):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    task = client.post(
+        f"/api/v1/workspaces/{workspace_id}/tasks", json={"title": "Patched", "status": "TODO"}, headers=headers
+    ).json()
+    task_url = f"/api/v1/tasks/{task['id']}"
+
+    # Access check, version bump and update (one statement on Postgres); counters untouched
+    with query_budget(3):
+        response = client.patch(task_url, json={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+    assert response.json()["status"] == "TODO"
+    assert response.json()["updated_at"] >= task["updated_at"]
+
+    outsider = get_auth_headers(client, "outsider@example.com")
+    assert client.patch(task_url, json={"title": "Nope"}, headers=outsider).status_code == 403
+    assert client.delete(task_url, headers=outsider).status_code == 403
+    assert client.patch("/api/v1/tasks/999999", json={"title": "Nope"}, headers=headers).status_code == 404
+
+    with query_budget(5):
+        assert client.delete(task_url, headers=headers).status_code == 200
+    assert client.delete(task_url, headers=headers).status_code == 404
+    assert client.get(f"/api/v1/workspaces/{workspace_id}/tasks/summary", headers=headers).json()["total"] == 0
@@ -0,0 +1,448 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from core.config import settings
+from api.v1 import auth
+from core.database import Base, ReadReplica, read_replica
+from core.metrics import count_queries
+from core.security import membership_cache
+from core.sync import compact_tombstones
+from models.task import Task, TaskCounter
+from models.workspace import WorkspaceMember
+from schemas.task import TaskResponse, TaskWithWorkspace
+
+from tests.helpers import get_auth_headers, get_workspace_id
+
+def test_list_tasks_keyset_pagination(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    for i in range(5):
+        client.post(
+            f"/api/v1/workspaces/{workspace_id}/tasks",
+            json={"title": f"Task {i}", "status": "DONE" if i % 2 else "TODO"},
+            headers=headers
+        )
+
+    titles = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/api/v1/workspaces/{workspace_id}/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        titles += [task["title"] for task in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert titles == [f"Task {i}" for i in range(5)]
+
+def test_list_tasks_pagination_with_filter(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    for i in range(5):
+        client.post(
+            f"/api/v1/workspaces/{workspace_id}/tasks",
+            json={"title": f"Task {i}", "status": "DONE" if i % 2 else "TODO"},
+            headers=headers
+        )
+
+    response = client.get(
+        f"/api/v1/workspaces/{workspace_id}/tasks",
+        params={"status": "TODO", "limit": 3},
+        headers=headers
+    )
+    assert [task["title"] for task in response.json()] == ["Task 0", "Task 2", "Task 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_list_tasks_invalid_cursor(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    response = client.get(
+        f"/api/v1/workspaces/{workspace_id}/tasks",
+        params={"limit": 2, "cursor": "not-a-cursor"},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+def create_my_tasks(client, headers):
+    user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+    workspace_id = get_workspace_id(client, headers)
+    specs = [
+        ("late", "P1", "2026-03-01T00:00:00"),
+        ("undated", "P1", None),
+        ("urgent", "P0", None),
+        ("early", "P1", "2026-02-01T00:00:00"),
+        ("low", "P3", "2026-01-01T00:00:00"),
+    ]
+    for title, priority, due_date in specs:
+        client.post(
+            f"/api/v1/workspaces/{workspace_id}/tasks",
+            json={"title": title, "priority": priority, "due_date": due_date, "assignee_id": user_id},
+            headers=headers
+        )
+    return ["urgent", "early", "late", "undated", "low"]
+
+def test_my_tasks_keyset_pagination(client):
+    headers = get_auth_headers(client)
+    expected = create_my_tasks(client, headers)
+
+    titles = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/tasks/me", params=params, headers=headers)
+        assert response.status_code == 200
+        titles += [task["title"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert titles == expected
+    assert client.get("/api/v1/tasks/me", headers=headers).json()[0]["workspace"]["name"] == "Personal"
+
+def test_my_tasks_stream(client):
+    headers = get_auth_headers(client)
+    expected = create_my_tasks(client, headers)
+
+    response = client.get("/api/v1/tasks/me", params={"stream": True}, headers=headers)
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == expected
+
+def test_batch_create_update_delete(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    token = headers["Authorization"].split(" ")[1]
+    existing = client.post(
+        f"/api/v1/workspaces/{workspace_id}/tasks", json={"title": "Existing"}, headers=headers
+    ).json()
+
+    with client.websocket_connect(f"/ws/{workspace_id}?token={token}") as websocket:
+        response = client.post(
+            f"/api/v1/workspaces/{workspace_id}/tasks:batch",
+            json={
+                "create": [{"title": "A"}, {"title": "B", "priority": "P0"}],
+                "update": [{"id": existing["id"], "status": "DONE"}, {"id": 9999, "title": "Missing"}],
+                "delete": [9998],
+            },
+            headers=headers
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [(r["op"], r["status"]) for r in results] == [
+            ("create", 201), ("create", 201), ("update", 200), ("update", 404), ("delete", 404)
+        ]
+        assert results[1]["task"]["priority"] == "P0"
+        assert results[2]["task"]["status"] == "DONE"
+        assert results[2]["task"]["title"] == "Existing"
+
+        message = websocket.receive_json()
+        assert message["type"] == "BATCH"
+        assert [event["type"] for event in message["events"]] == ["TASK_CREATED", "TASK_CREATED", "TASK_UPDATED"]
+
+    created_ids = [results[0]["id"], results[1]["id"]]
+    response = client.post(
+        f"/api/v1/workspaces/{workspace_id}/tasks:batch", json={"delete": created_ids}, headers=headers
+    )
+    assert [r["status"] for r in response.json()["results"]] == [200, 200]
+    titles = [task["title"] for task in client.get(f"/api/v1/workspaces/{workspace_id}/tasks", headers=headers).json()]
+    assert titles == ["Existing"]
+
+def test_batch_rejects_other_workspace_tasks(client):
+    owner_headers = get_auth_headers(client, "owner@example.com")
+    other_headers = get_auth_headers(client, "other@example.com")
+    owner_workspace = get_workspace_id(client, owner_headers)
+    other_workspace = get_workspace_id(client, other_headers)
+    task = client.post(
+        f"/api/v1/workspaces/{owner_workspace}/tasks", json={"title": "Private"}, headers=owner_headers
+    ).json()
+
+    response = client.post(
+        f"/api/v1/workspaces/{other_workspace}/tasks:batch",
+        json={"update": [{"id": task["id"], "title": "Hijacked"}], "delete": [task["id"]]},
+        headers=other_headers
+    )
+    assert [r["status"] for r in response.json()["results"]] == [404, 404]
+
+    response = client.post(
+        f"/api/v1/workspaces/{owner_workspace}/tasks:batch", json={"delete": [task["id"]]}, headers=other_headers
+    )
+    assert response.status_code == 403
+
+def test_batch_create_many(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+
+    response = client.post(
+        f"/api/v1/workspaces/{workspace_id}/tasks:batch",
+        json={"create": [{"title": f"Imported {i}"} for i in range(2000)]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2000
+    assert results[-1]["task"]["title"] == "Imported 1999"
+
+def test_list_tasks_conditional_get(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    url = f"/api/v1/workspaces/{workspace_id}/tasks"
+
+    response = client.get(url, headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Different filters are different representations
+    assert client.get(url, params={"status": "DONE"}, headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    task = client.post(url, json={"title": "Changed"}, headers=headers).json()
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    etag = response.headers["ETag"]
+    client.patch(f"/api/v1/tasks/{task['id']}", json={"status": "DONE"}, headers=headers)
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_task_changes_feed(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    changes_url = f"{tasks_url}/changes"
+
+    doomed = client.post(tasks_url, json={"title": "Doomed"}, headers=headers).json()
+    kept = client.post(tasks_url, json={"title": "Kept"}, headers=headers).json()
+
+    # Initial sync returns everything
+    snapshot = client.get(changes_url, headers=headers).json()
+    assert [task["id"] for task in snapshot["tasks"]] == [doomed["id"], kept["id"]]
+    assert snapshot["deleted"] == []
+
+    # Nothing changed since the cursor
+    unchanged = client.get(changes_url, params={"since": snapshot["cursor"]}, headers=headers).json()
+    assert unchanged == {"tasks": [], "deleted": [], "cursor": snapshot["cursor"]}
+
+    client.patch(f"/api/v1/tasks/{kept['id']}", json={"status": "DONE"}, headers=headers)
+    client.delete(f"/api/v1/tasks/{doomed['id']}", headers=headers)
+    added = client.post(
+        f"{tasks_url}:batch", json={"create": [{"title": "Added"}]}, headers=headers
+    ).json()["results"][0]["task"]
+
+    delta = client.get(changes_url, params={"since": snapshot["cursor"]}, headers=headers).json()
+    assert [task["id"] for task in delta["tasks"]] == [kept["id"], added["id"]]
+    assert delta["tasks"][0]["status"] == "DONE"
+    assert delta["deleted"] == [doomed["id"]]
+
+    # Cursors are bound to their workspace
+    other_id = client.post("/api/v1/workspaces/", json={"name": "Other"}, headers=headers).json()["id"]
+    response = client.get(
+        f"/api/v1/workspaces/{other_id}/tasks/changes", params={"since": delta["cursor"]}, headers=headers
+    )
+    assert response.status_code == 400
+
+def test_task_changes_cursor_expires_after_compaction(client, db_session):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    changes_url = f"{tasks_url}/changes"
+
+    task = client.post(tasks_url, json={"title": "Old"}, headers=headers).json()
+    cursor = client.get(changes_url, headers=headers).json()["cursor"]
+    client.delete(f"/api/v1/tasks/{task['id']}", headers=headers)
+    fresh_cursor = client.get(changes_url, headers=headers).json()["cursor"]
+
+    later = datetime.utcnow() + timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS + 1)
+    assert client.portal.call(compact_tombstones, db_session, later) == 1
+
+    response = client.get(changes_url, params={"since": cursor}, headers=headers)
+    assert response.status_code == 410
+    # Cursors taken after the compacted deletion keep working
+    response = client.get(changes_url, params={"since": fresh_cursor}, headers=headers)
+    assert response.status_code == 200
+
+def test_task_summary_counters(client, db_session):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    summary_url = f"{tasks_url}/summary"
+    yesterday = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).isoformat()
+
+    late = client.post(tasks_url, json={"title": "Late", "due_date": yesterday, "assignee_id": user_id}, headers=headers).json()
+    client.post(tasks_url, json={"title": "Soon", "due_date": tomorrow, "priority": "P0"}, headers=headers)
+    doomed = client.post(tasks_url, json={"title": "Doomed", "due_date": yesterday}, headers=headers).json()
+    client.post(
+        f"{tasks_url}:batch",
+        json={
+            "create": [{"title": "Batched", "status": "IN_PROGRESS"}],
+            "update": [{"id": late["id"], "status": "DONE"}],
+            "delete": [doomed["id"]],
+        },
+        headers=headers
+    )
+
+    summary = client.get(summary_url, headers=headers).json()
+    assert summary == {
+        "total": 3,
+        "by_status": {"TODO": 1, "IN_PROGRESS": 1, "DONE": 1, "BACKLOG": 0},
+        "by_priority": {"P0": 1, "P1": 0, "P2": 2, "P3": 0},
+        "by_assignee": {str(user_id): 1},
+        "unassigned": 2,
+        "overdue": 0,
+    }
+
+    # Reopening the late task makes it overdue again
+    client.patch(f"/api/v1/tasks/{late['id']}", json={"status": "TODO", "assignee_id": None}, headers=headers)
+    summary = client.get(summary_url, headers=headers).json()
+    assert summary["overdue"] == 1
+    assert summary["by_assignee"] == {}
+    assert summary["unassigned"] == 3
+
+    # Rebuilding from the tasks themselves gives the same answer
+    client.portal.call(db_session.execute, delete(TaskCounter))
+    client.portal.call(db_session.commit)
+    assert client.get(summary_url, headers=headers).json()["total"] == 0
+    assert client.post(f"{summary_url}:rebuild", headers=headers).json() == summary
+
+def test_search_tasks_ranked_and_scoped(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    client.post(tasks_url, json={"title": "Quarterly report", "description": "Draft the numbers"}, headers=headers)
+    client.post(tasks_url, json={"title": "Email Bob", "description": "Ask for the quarterly reports"}, headers=headers)
+    client.post(tasks_url, json={"title": "Unrelated"}, headers=headers)
+    renamed = client.post(tasks_url, json={"title": "Old name"}, headers=headers).json()
+    client.patch(f"/api/v1/tasks/{renamed['id']}", json={"title": "Report card"}, headers=headers)
+
+    # Someone else's matching task is never returned
+    other_headers = get_auth_headers(client, "other@example.com")
+    other_workspace_id = get_workspace_id(client, other_headers)
+    client.post(
+        f"/api/v1/workspaces/{other_workspace_id}/tasks", json={"title": "Secret quarterly report"}, headers=other_headers
+    )
+
+    response = client.get("/api/v1/tasks/search", params={"q": "quarterly report"}, headers=headers)
+    results = response.json()
+    # Title matches rank above description-only matches; "reports" matches by stem
+    assert [task["title"] for task in results] == ["Quarterly report", "Email Bob"]
+    assert results[0]["workspace"]["id"] == workspace_id
+
+    # Prefix match on the last word, paged one at a time
+    titles = []
+    cursor = None
+    while True:
+        params = {"q": "repo", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/tasks/search", params=params, headers=headers)
+        titles.extend(task["title"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(titles) == ["Email Bob", "Quarterly report", "Report card"]
+
+    client.delete(f"/api/v1/tasks/{renamed['id']}", headers=headers)
+    assert client.get("/api/v1/tasks/search", params={"q": "card"}, headers=headers).json() == []
+    # Operators in user input are treated as plain words
+    assert client.get("/api/v1/tasks/search", params={"q": '") OR *'}, headers=headers).json() == []
+
+def test_list_projections_match_response_schemas(client, db_session):
+    headers = get_auth_headers(client)
+    user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    client.post(tasks_url, json={"title": "Dated", "due_date": "2026-11-01T09:30:00.250000", "assignee_id": user_id}, headers=headers)
+    client.post(tasks_url, json={"title": "Plain", "description": "ü \"quoted\"", "priority": "P0", "assignee_id": user_id}, headers=headers)
+
+    tasks = client.portal.call(
+        db_session.scalars, select(Task).options(selectinload(Task.workspace)).order_by(Task.id)
+    ).all()
+    expected = [TaskResponse.model_validate(task).model_dump(mode="json") for task in tasks]
+    assert client.get(tasks_url, headers=headers).json() == expected
+
+    by_feed_order = sorted(tasks, key=lambda task: task.priority.value)
+    assert client.get("/api/v1/tasks/me", headers=headers).json() == [
+        TaskWithWorkspace.model_validate(task).model_dump(mode="json") for task in by_feed_order
+    ]
+
+@contextmanager
+def lagging_replica(client, *rows):
+    """
+    Route reads to a second database standing in for a replica that has not caught up yet,
+    holding only `rows`.
+    """
+    replica = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async def create_replica_tables():
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for table, values in rows:
+                await conn.execute(insert(table), values)
+    client.portal.call(create_replica_tables)
+    read_replica.sessionmaker = async_sessionmaker(bind=replica, class_=AsyncSession, expire_on_commit=False)
+    try:
+        yield replica
+    finally:
+        read_replica.sessionmaker = None
+        client.portal.call(replica.dispose)
+
+def test_reads_use_replica_until_the_client_writes(client, monkeypatch):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    client.post(tasks_url, json={"title": "On the primary"}, headers=headers)
+
+    with lagging_replica(client) as replica:
+        with count_queries(replica) as log:
+            assert client.get(tasks_url, headers=headers).json() == []
+            assert client.get("/api/v1/tasks/me", headers=headers).json() == []
+        assert log.count > 0
+
+        response = client.post(tasks_url, json={"title": "Second"}, headers=headers)
+        last_write = response.headers["X-Last-Write"]
+        assert "X-Last-Write" not in client.get(tasks_url, headers=headers).headers
+
+        # The next read lands on another worker, which knows nothing of the write but the client's header
+        other_worker = ReadReplica("")
+        other_worker.sessionmaker = read_replica.sessionmaker
+        monkeypatch.setattr(auth, "read_replica", other_worker)
+        fresh = {**headers, "X-Last-Write": last_write}
+        assert len(client.get(tasks_url, headers=fresh).json()) == 2
+
+        stale = {**headers, "X-Last-Write": str(float(last_write) - settings.READ_YOUR_WRITES_SECONDS - 1)}
+        assert client.get(tasks_url, headers=stale).json() == []
+
+def test_replica_lag_never_reaches_the_membership_cache(client):
+    admin_headers = get_auth_headers(client, "lag.admin@example.com")
+    workspace_id = client.post("/api/v1/workspaces/", json={"name": "Lag"}, headers=admin_headers).json()["id"]
+    members_url = f"/api/v1/workspaces/{workspace_id}/members"
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    invitee_headers = get_auth_headers(client, "lag.invitee@example.com")
+    removed_headers = get_auth_headers(client, "lag.removed@example.com")
+    removed_id = client.post(members_url, json={"email": "lag.removed@example.com"}, headers=admin_headers).json()["user_id"]
+
+    # The replica still has the removed user's membership and not yet the invitee's
+    stale_membership = (WorkspaceMember, [{"workspace_id": workspace_id, "user_id": removed_id, "role": "MEMBER"}])
+    with lagging_replica(client, stale_membership):
+        client.delete(f"{members_url}/{removed_id}", headers=admin_headers)
+        client.post(members_url, json={"email": "lag.invitee@example.com"}, headers=admin_headers)
+        membership_cache.clear()
+
+        for url in (tasks_url, members_url):
+            assert client.get(url, headers=invitee_headers).status_code == 200
+            assert client.get(url, headers=removed_headers).status_code == 403
+        assert client.post(tasks_url, json={"title": "Invited"}, headers=invitee_headers).status_code == 200
+        assert client.post(tasks_url, json={"title": "Removed"}, headers=removed_headers).status_code == 403
@@ -0,0 +1,54 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from tests.helpers import get_auth_headers, get_workspace_id
+
+def test_websocket_receives_task_events(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    token = headers["Authorization"].split(" ")[1]
+
+    with client.websocket_connect(f"/ws/{workspace_id}?token={token}") as websocket:
+        response = client.post(
+            f"/api/v1/workspaces/{workspace_id}/tasks",
+            json={"title": "Live task"},
+            headers=headers
+        )
+        message = websocket.receive_json()
+        assert message["type"] == "TASK_CREATED"
+        assert message["task"]["title"] == "Live task"
+
+        client.delete(f"/api/v1/tasks/{response.json()['id']}", headers=headers)
+        assert websocket.receive_json() == {
+            "type": "TASK_DELETED", "task_id": response.json()["id"], "seq": message["seq"] + 1
+        }
+
+def test_websocket_resumes_from_last_seq(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    token = headers["Authorization"].split(" ")[1]
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+
+    with client.websocket_connect(f"/ws/{workspace_id}?token={token}") as websocket:
+        client.post(tasks_url, json={"title": "Seen"}, headers=headers)
+        last_seq = websocket.receive_json()["seq"]
+
+    # Created while disconnected
+    client.post(tasks_url, json={"title": "Missed"}, headers=headers)
+
+    with client.websocket_connect(f"/ws/{workspace_id}?token={token}&last_seq={last_seq}") as websocket:
+        message = websocket.receive_json()
+        assert message["task"]["title"] == "Missed"
+        assert message["seq"] == last_seq + 1
+
+    with client.websocket_connect(f"/ws/{workspace_id}?token={token}&last_seq=1") as websocket:
+        assert websocket.receive_json()["type"] == "RESYNC"
+
+def test_websocket_rejects_non_member(client):
+    owner_headers = get_auth_headers(client, "owner@example.com")
+    workspace_id = get_workspace_id(client, owner_headers)
+    outsider_token = get_auth_headers(client, "outsider@example.com")["Authorization"].split(" ")[1]
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/ws/{workspace_id}?token={outsider_token}") as websocket:
+            websocket.receive_json()
@@ -0,0 +1,138 @@
+from core.security import membership_cache
+from core.websocket import manager
+from tests.helpers import get_auth_headers, get_workspace_id
+
+def create_team_workspace(client, headers, name="Team"):
+    response = client.post("/api/v1/workspaces/", json={"name": name}, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_membership_cache_follows_invite_and_remove(client):
+    admin_headers = get_auth_headers(client, "admin@example.com")
+    member_headers = get_auth_headers(client, "member@example.com")
+    workspace_id = create_team_workspace(client, admin_headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+
+    # Cached as "not a member" first
+    assert client.get(tasks_url, headers=member_headers).status_code == 403
+
+    response = client.post(
+        f"/api/v1/workspaces/{workspace_id}/members",
+        json={"email": "member@example.com"},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == "member@example.com"
+    member_id = response.json()["user_id"]
+    assert client.get(tasks_url, headers=member_headers).status_code == 200
+
+    response = client.delete(f"/api/v1/workspaces/{workspace_id}/members/{member_id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get(tasks_url, headers=member_headers).status_code == 403
+
+def test_membership_lookups_are_cached(client):
+    headers = get_auth_headers(client)
+    workspace_id = get_workspace_id(client, headers)
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+
+    client.get(tasks_url, headers=headers)
+    hits = membership_cache.hits
+    client.get(tasks_url, headers=headers)
+    assert membership_cache.hits == hits + 1
+
+    stats = client.get("/health/caches").json()["memberships"]
+    assert stats["hits"] == membership_cache.hits
+    assert stats["size"] >= 1
+
+def test_member_and_workspace_lists_conditional_get(client):
+    admin_headers = get_auth_headers(client, "admin@example.com")
+    get_auth_headers(client, "member@example.com")
+    workspace_id = create_team_workspace(client, admin_headers)
+    members_url = f"/api/v1/workspaces/{workspace_id}/members"
+
+    members_etag = client.get(members_url, headers=admin_headers).headers["ETag"]
+    workspaces_etag = client.get("/api/v1/workspaces/", headers=admin_headers).headers["ETag"]
+    assert client.get(members_url, headers={**admin_headers, "If-None-Match": members_etag}).status_code == 304
+    assert client.get(
+        "/api/v1/workspaces/", headers={**admin_headers, "If-None-Match": workspaces_etag}
+    ).status_code == 304
+
+    client.post(members_url, json={"email": "member@example.com"}, headers=admin_headers)
+    response = client.get(members_url, headers={**admin_headers, "If-None-Match": members_etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    create_team_workspace(client, admin_headers, "Another")
+    assert client.get(
+        "/api/v1/workspaces/", headers={**admin_headers, "If-None-Match": workspaces_etag}
+    ).status_code == 200
+
+def test_bulk_invite_members(client, query_budget, monkeypatch):
+    admin_headers = get_auth_headers(client, "bulkadmin@example.com")
+    workspace_id = create_team_workspace(client, admin_headers)
+    members_url = f"/api/v1/workspaces/{workspace_id}/members"
+    for index in range(30):
+        get_auth_headers(client, f"invitee{index}@example.com")
+    client.post(members_url, json={"email": "invitee0@example.com"}, headers=admin_headers)
+    member_headers = get_auth_headers(client, "invitee5@example.com")
+    tasks_url = f"/api/v1/workspaces/{workspace_id}/tasks"
+    assert client.get(tasks_url, headers=member_headers).status_code == 403  # Caches "not a member"
+
+    broadcasts = []
+    async def record_broadcast(workspace_id, message):
+        broadcasts.append((workspace_id, message))
+    monkeypatch.setattr(manager, "broadcast", record_broadcast)
+
+    emails = [f"invitee{index}@example.com" for index in range(30)] + ["nobody@example.com", "invitee1@example.com"]
+    # Admin check, users, memberships, insert, version bump: independent of the number of emails
+    with query_budget(5):
+        response = client.post(f"{members_url}:batch", json={"emails": emails}, headers=admin_headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["email"] for r in results] == emails[:31]
+    assert [r["status"] for r in results] == [400] + [200] * 29 + [404]
+
+    assert len(broadcasts) == 1
+    assert broadcasts[0][1]["type"] == "MEMBERS_ADDED"
+    assert len(broadcasts[0][1]["members"]) == 29
+    assert client.get(tasks_url, headers=member_headers).status_code == 200
+    assert len(client.get(members_url, headers=admin_headers).json()) == 31
+
+    assert client.post(f"{members_url}:batch", json={"emails": emails}, headers=member_headers).status_code == 403
+
+def test_member_directory_pages_and_searches(client):
+    admin_headers = get_auth_headers(client, "zed.admin@example.com")
+    workspace_id = create_team_workspace(client, admin_headers)
+    members_url = f"/api/v1/workspaces/{workspace_id}/members"
+    emails = [f"ann{index}@example.com" for index in range(7)] + ["Bob@example.com", "bo_b@example.com", "carl@example.com"]
+    for email in emails:
+        get_auth_headers(client, email)
+    client.post(f"{members_url}:batch", json={"emails": emails}, headers=admin_headers)
+
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get(members_url, params=params, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "11"
+        pages.append([member["user"]["email"] for member in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert sum(pages, []) == sorted(emails + ["zed.admin@example.com"], key=str.lower)
+
+    # Case-insensitive prefix; LIKE wildcards in the query are literal
+    response = client.get(members_url, params={"q": "BO", "limit": 1}, headers=admin_headers)
+    assert response.headers["X-Total-Count"] == "2"
+    assert [m["user"]["email"] for m in response.json()] == ["bo_b@example.com"]
+    response = client.get(members_url, params={"q": "bo_"}, headers=admin_headers)
+    assert [m["user"]["email"] for m in response.json()] == ["bo_b@example.com"]
+    response = client.get(members_url, params={"q": "a%"}, headers=admin_headers)
+    assert response.json() == [] and response.headers["X-Total-Count"] == "0"
+
+    # Unpaginated listing keeps its shape
+    members = client.get(members_url, headers=admin_headers).json()
+    assert len(members) == 11
+    assert set(members[0]) == {"workspace_id", "user_id", "role", "user"}
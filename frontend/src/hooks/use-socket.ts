@@ -5,6 +5,8 @@ import { useWorkspaceStore } from "@/store/workspace-store";
 import { API_URL } from "@/lib/api";
 import { Task } from "@/types";
 
+const RECONNECT_DELAY_MS = 1000;
+
 export function useSocket() {
   const { activeWorkspaceId } = useWorkspaceStore();
   const { mutate } = useSWRConfig();
@@ -21,65 +23,86 @@ export function useSocket() {
     const wsBaseUrl = API_URL.replace(/^https?:\/\//, "");
     const wsUrl = `${wsProtocol}://${wsBaseUrl}/ws/${activeWorkspaceId}?token=${token}`;
 
-    const socket = new WebSocket(wsUrl);
-    socketRef.current = socket;
+    // Seq of the last frame received; reconnects resume from it instead of reloading the list
+    let lastSeq: number | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
 
-    socket.onopen = () => {
-      console.log("WebSocket Connected");
-    };
+    const connect = () => {
+      const socket = new WebSocket(lastSeq === null ? wsUrl : `${wsUrl}&last_seq=${lastSeq}`);
+      socketRef.current = socket;
 
-    socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        handleMessage(data, activeWorkspaceId, mutate);
-      } catch (err) {
-        console.error("Failed to parse WS message", err);
-      }
-    };
+      socket.onopen = () => {
+        console.log("WebSocket Connected");
+      };
+
+      socket.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+          if (typeof data.seq === "number") lastSeq = data.seq;
+          handleMessage(data, activeWorkspaceId, mutate);
+        } catch (err) {
+          console.error("Failed to parse WS message", err);
+        }
+      };
 
-    socket.onclose = () => {
-      console.log("WebSocket Disconnected");
+      socket.onclose = () => {
+        console.log("WebSocket Disconnected");
+        if (!closed) reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+      };
     };
 
+    connect();
+
     return () => {
-      socket.close();
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socketRef.current?.close();
     };
   }, [activeWorkspaceId, mutate]);
 
   return socketRef.current;
 }
 
+function applyEvent(currentTasks: Task[], event: any): Task[] {
+  switch (event.type) {
+    case "TASK_CREATED":
+      return [...currentTasks, event.task];
+    case "TASK_UPDATED":
+      return currentTasks.map((t) => (t.id === event.task.id ? event.task : t));
+    case "TASK_DELETED":
+      return currentTasks.filter((t) => t.id !== event.task_id);
+    default:
+      return currentTasks;
+  }
+}
+
 function handleMessage(message: any, workspaceId: number, mutate: any) {
   const tasksKey = `/api/v1/workspaces/${workspaceId}/tasks`;
   const myTasksKey = "/api/v1/tasks/me";
 
-  switch (message.type) {
-    case "TASK_CREATED":
-    case "TASK_UPDATED":
-      const task: Task = message.task;
-      
-      // Update Workspace Tasks
-      mutate(tasksKey, (currentTasks: Task[] = []) => {
-        if (message.type === "TASK_CREATED") {
-          return [...currentTasks, task];
-        }
-        return currentTasks.map((t) => (t.id === task.id ? task : t));
-      }, false); // false = do not revalidate immediately
+  // The events since our last_seq are gone from the server's buffer: reload everything
+  if (message.type === "RESYNC") {
+    mutate(tasksKey);
+    mutate(myTasksKey);
+    return;
+  }
 
-      // Update My Tasks (Inbox) - only if assigned to me (but we don't know current user id here easily without store)
-      // For simplicity, we can revalidate the inbox or optimistic update if we knew the user ID.
-      // Let's just revalidate inbox to be safe and simple.
-      mutate(myTasksKey);
-      break;
+  // A BATCH frame carries several events that are applied in a single store update
+  const events = message.type === "BATCH" ? message.events : [message];
 
-    case "TASK_DELETED":
-      const taskId = message.task_id;
-      
-      mutate(tasksKey, (currentTasks: Task[] = []) => {
-        return currentTasks.filter((t) => t.id !== taskId);
-      }, false);
-
-      mutate(myTasksKey);
-      break;
+  // Member events may arrive alone or inside a BATCH; either way the member list is reloaded
+  if (events.some((event: any) => event.type === "MEMBERS_ADDED")) {
+    mutate(`/api/v1/workspaces/${workspaceId}/members`);
   }
+  if (events.every((event: any) => event.type === "MEMBERS_ADDED")) return;
+
+  // Update Workspace Tasks
+  mutate(tasksKey, (currentTasks: Task[] = []) => {
+    return events.reduce(applyEvent, currentTasks);
+  }, false); // false = do not revalidate immediately
+
+  // Update My Tasks (Inbox) - we don't know the current user id here easily without store,
+  // so just revalidate the inbox to be safe and simple.
+  mutate(myTasksKey);
 }
@@ -10,12 +10,26 @@ const api = axios.create({
   },
 });
 
+// Time of our latest write, echoed back so reads skip a lagging replica until it has caught up
+let lastWrite: string | undefined;
+
 api.interceptors.request.use((config) => {
   const token = Cookies.get("token");
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  if (lastWrite) {
+    config.headers["X-Last-Write"] = lastWrite;
+  }
   return config;
 });
 
+api.interceptors.response.use((response) => {
+  const written = response.headers["x-last-write"];
+  if (written) {
+    lastWrite = written;
+  }
+  return response;
+});
+
 export default api;